@@ -1,84 +1,125 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
 import re
+import time
 from datetime import date, timedelta
 
 # --- 페이지 기본 설정 ---
 st.set_page_config(layout="wide", page_title="지능형 생산 대시보드 V105 (차트 축 자동 범위 최적화 V4)", page_icon="👑")
 
 # --- 데이터 로딩 및 캐싱 ---
-@st.cache_data
-def load_all_data():
+DATASET_KEYWORDS = {
+    'target': '목표달성율', 
+    'yield': '수율', 
+    'utilization': '가동률', 
+    'low_util': '저가동설비',
+    'defect': ('불량실적현황', '최적화')
+}
+
+def find_latest_dataset_files(current_directory='.'):
     """
     [V90 수정] 파일 로딩의 안정성을 극대화하기 위해 '정규화' 로직을 도입했습니다.
     파일 이름에서 괄호 '()'와 공백을 모두 제거한 후 키워드와 비교하여, 눈에 보이지 않는 문자나 특수문자로 인해 파일 검색이 실패하는 문제를 원천적으로 방지합니다.
     이 로직은 모든 파일(.xlsx, .xls) 검색에 적용됩니다.
     """
-    data_frames = {}
-    keywords = {
-        'target': '목표달성율', 
-        'yield': '수율', 
-        'utilization': '가동률', 
-        'low_util': '저가동설비',
-        'defect': ('불량실적현황', '최적화')
-    }
-    
-    current_directory = '.'
+    latest_files = {}
     all_files_in_dir = os.listdir(current_directory)
 
-    for key, keyword_info in keywords.items():
-        try:
-            relevant_files = []
-            for f in all_files_in_dir:
-                filename_without_ext, ext = os.path.splitext(f)
-                
-                if ext.lower() not in ['.xlsx', '.xls']:
-                    continue
-                
-                normalized_name = filename_without_ext.replace("(", "").replace(")", "").replace(" ", "")
-
-                if key == 'defect':
-                    kw_base, kw_opt = keyword_info
-                    if kw_base in normalized_name and kw_opt in normalized_name:
-                        relevant_files.append(f)
-                else:
-                    if keyword_info in normalized_name:
-                        relevant_files.append(f)
+    for key, keyword_info in DATASET_KEYWORDS.items():
+        relevant_files = []
+        for f in all_files_in_dir:
+            filename_without_ext, ext = os.path.splitext(f)
+            
+            if ext.lower() not in ['.xlsx', '.xls']:
+                continue
+            
+            normalized_name = filename_without_ext.replace("(", "").replace(")", "").replace(" ", "")
 
-            if relevant_files:
-                latest_file = max(relevant_files, key=lambda f: os.path.getmtime(os.path.join(current_directory, f)))
-                file_path = os.path.join(current_directory, latest_file)
-                df = pd.read_excel(file_path, engine=None)
-                
-                for col in df.columns:
-                    if df[col].dtype == 'object' and ('%' in str(df[col].iloc[0]) if not df[col].empty and df[col].iloc[0] is not None else False):
-                        df[col] = df[col].astype(str).str.replace('%', '', regex=False).str.strip()
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                if key == 'defect':
-                    cols = pd.Series(df.columns)
-                    for dup in cols[cols.duplicated()].unique():
-                        cols[cols[cols == dup].index.values.tolist()] = [f"{dup}_{i}" if i != 0 else dup for i in range(sum(cols == dup))]
-                    df.columns = cols
-                    
-                    rename_dict = {}
-                    if '불량수량(유형별)' in df.columns: rename_dict['불량수량(유형별)'] = '유형별_불량수량'
-                    if '불량수량(전체)' in df.columns: rename_dict['불량수량(전체)'] = '총_불량수량'
-                    elif '불량수량' in df.columns and '불량수량_1' in df.columns:
-                        rename_dict['불량수량'] = '총_불량수량'
-                        rename_dict['불량수량_1'] = '유형별_불량수량'
-                    df = df.rename(columns=rename_dict)
-
-                data_frames[key] = (df, latest_file)
+            if key == 'defect':
+                kw_base, kw_opt = keyword_info
+                if kw_base in normalized_name and kw_opt in normalized_name:
+                    relevant_files.append(f)
             else:
-                 data_frames[key] = (pd.DataFrame(), None)
+                if keyword_info in normalized_name:
+                    relevant_files.append(f)
+
+        latest_files[key] = max(relevant_files, key=lambda f: os.path.getmtime(os.path.join(current_directory, f))) if relevant_files else None
+    return latest_files
+
+def load_dataset(key, file_path, file_size, file_mtime):
+    """
+    [V107 수정] 데이터셋 하나를 읽습니다. 파일 (이름, 크기, 수정시각) 지문은 prepare_dataset의 캐시 키로 쓰이므로,
+    분석기가 새 결과 파일을 저장한 데이터셋만 다시 읽고 나머지는 캐시를 그대로 사용합니다.
+    두 번째 반환값(읽은 시각)으로 이번 실행에서 새로 읽었는지 판별합니다.
+    """
+    df = pd.read_excel(file_path, engine=None)
+    
+    for col in df.columns:
+        if df[col].dtype == 'object' and ('%' in str(df[col].iloc[0]) if not df[col].empty and df[col].iloc[0] is not None else False):
+            df[col] = df[col].astype(str).str.replace('%', '', regex=False).str.strip()
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    if key == 'defect':
+        cols = pd.Series(df.columns)
+        for dup in cols[cols.duplicated()].unique():
+            cols[cols[cols == dup].index.values.tolist()] = [f"{dup}_{i}" if i != 0 else dup for i in range(sum(cols == dup))]
+        df.columns = cols
+        
+        rename_dict = {}
+        if '불량수량(유형별)' in df.columns: rename_dict['불량수량(유형별)'] = '유형별_불량수량'
+        if '불량수량(전체)' in df.columns: rename_dict['불량수량(전체)'] = '총_불량수량'
+        elif '불량수량' in df.columns and '불량수량_1' in df.columns:
+            rename_dict['불량수량'] = '총_불량수량'
+            rename_dict['불량수량_1'] = '유형별_불량수량'
+        df = df.rename(columns=rename_dict)
+
+    return df, time.time()
+
+@st.cache_resource(max_entries=20, show_spinner="데이터 파일을 읽고 준비하는 중...")
+def prepare_dataset(key, file_path, file_size, file_mtime):
+    """
+    [V107 수정] 데이터셋을 읽고 날짜 컬럼 추가, 공정코드 표준화, 날짜순 정렬까지 마친 결과를 파일 지문별로 한 번만 계산합니다.
+    캐시된 데이터프레임을 복사 없이 그대로 돌려주므로 화면을 다시 그릴 때는 컬럼 전체를 다시 처리하지 않습니다.
+    반환된 데이터프레임은 여러 실행이 공유하므로 수정하지 말고, 값을 바꿀 때는 복사본을 사용해야 합니다.
+    기간 추이 차트용 롤업(build_rollups, ROLLUP_SPECS)도 이때 함께 만듭니다.
+    (준비된 데이터프레임, 메타데이터, 롤업, 읽은 시각)을 반환합니다.
+    """
+    df, loaded_at = load_dataset(key, file_path, file_size, file_mtime)
+    if key != 'low_util' and not df.empty:
+        df = sort_by_date(normalize_process_codes(add_date_column(df)))
+        if key == 'defect' and '유형별_불량수량' in df.columns: df['유형별_불량수량'] = pd.to_numeric(df['유형별_불량수량'], errors='coerce').fillna(0)
+    rollups = build_rollups(df, *ROLLUP_SPECS[key]) if key in ROLLUP_SPECS else {}
+    return df, dict(describe_dataset(df), fingerprint=(key, file_path, file_size, file_mtime)), rollups, loaded_at
+
+def load_all_data():
+    """
+    [V107 수정] 데이터셋별로 최신 파일의 지문을 확인하여 변경된 데이터셋만 다시 읽고 준비합니다.
+    (데이터프레임, 파일명) 사전, 데이터셋별 로딩 상태('캐시' 또는 '새로 로딩'), 메타데이터 목록, 데이터셋별 롤업을 반환합니다.
+    메타데이터 목록은 {'date_bounds': 전체 데이터의 (시작일, 종료일) 또는 None, 'datasets': {데이터셋: describe_dataset 결과}} 형태입니다.
+    """
+    data_frames, load_status, manifests, rollups = {}, {}, {}, {}
+    current_directory = '.'
+    run_started_at = time.time()
+
+    for key, latest_file in find_latest_dataset_files(current_directory).items():
+        data_frames[key], load_status[key], manifests[key], rollups[key] = (pd.DataFrame(), None), None, describe_dataset(pd.DataFrame()), {}
+        if not latest_file: continue
+        try:
+            file_path = os.path.join(current_directory, latest_file)
+            file_stat = os.stat(file_path)
+            df, manifest, dataset_rollups, loaded_at = prepare_dataset(key, file_path, file_stat.st_size, file_stat.st_mtime_ns)
+            data_frames[key], manifests[key], rollups[key] = (df, latest_file), manifest, dataset_rollups
+            load_status[key] = '새로 로딩' if loaded_at >= run_started_at else '캐시'
         except Exception:
             data_frames[key] = (pd.DataFrame(), None)
-    return data_frames
+    bounds = [manifests[key]['date_bounds'] for key in ['target', 'yield', 'utilization', 'defect'] if manifests.get(key, {}).get('date_bounds')]
+    overall_bounds = (min(first for first, _ in bounds), max(last for _, last in bounds)) if bounds else None
+    return data_frames, load_status, {'date_bounds': overall_bounds, 'datasets': manifests}, rollups
 
 # --- AI 분석 엔진 ---
 def analyze_target_data(df): return "#### AI Analyst 브리핑\n'양품 기반 달성률'을 기준으로 공장/공정별 성과를 비교하고, 목표 대비 **양품 수량**의 차이가 큰 항목을 확인하여 품질 및 생산성 개선 포인트를 동시에 도출해야 합니다."
@@ -93,24 +134,34 @@ def analyze_defect_data(df): return "#### AI Analyst 브리핑\n'파레토 분
 PROCESS_MASTER_ORDER = ['[10] 사출조립', '[20] 분리', '[45] 하이드레이션/전면검사', '[55] 접착/멸균', '[80] 누수/규격검사']
 
 def normalize_process_codes(df):
-    """공정 컬럼의 값을 표준화하고, 컬럼명을 '공정코드'로 통일하며, 안정성을 높입니다."""
+    """
+    [V107 수정] 공정 컬럼의 값을 표준화하고, 컬럼명을 '공정코드'로 통일하며, 안정성을 높입니다.
+    표준화는 고유값에만 적용하고, 결과는 PROCESS_MASTER_ORDER 순서(목록에 없는 값은 그 뒤에 이름순)를 따르는 순서형 범주(Categorical)로 저장합니다.
+    """
     process_col_name = None
     if '공정코드' in df.columns: process_col_name = '공정코드'
     elif '공정' in df.columns: process_col_name = '공정'
     else: return df
-    df[process_col_name] = df[process_col_name].astype(str).str.strip()
     process_map = {re.search(r'\[(\d+)\]', name).group(1): name for name in PROCESS_MASTER_ORDER}
     def map_process(process_name):
-        if not isinstance(process_name, str): return process_name
         match = re.search(r'\[(\d+)\]', process_name)
         return process_map.get(match.group(1), process_name) if match else process_name
-    df[process_col_name] = df[process_col_name].apply(map_process)
+    row_codes, unique_values = pd.factorize(df[process_col_name], use_na_sentinel=False)
+    normalized = [map_process(str(value).strip()) for value in unique_values]
+    categories = [name for name in PROCESS_MASTER_ORDER if name in normalized] + sorted(set(normalized) - set(PROCESS_MASTER_ORDER))
+    category_index = {name: i for i, name in enumerate(categories)}
+    category_codes = np.array([category_index[name] for name in normalized], dtype=np.int64)
+    df[process_col_name] = pd.Categorical.from_codes(category_codes[row_codes], categories=categories, ordered=True)
     if process_col_name == '공정': df = df.rename(columns={'공정': '공정코드'})
     return df
 
 def get_process_order(df, col_name='공정코드'):
+    """[V107 수정] df에 있는 공정을 PROCESS_MASTER_ORDER 순으로 반환합니다. 범주형 컬럼은 행 값 대신 사용 중인 범주 코드만 확인합니다."""
     if col_name not in df.columns: return []
-    processes_in_df = df[col_name].unique()
+    if isinstance(df[col_name].dtype, pd.CategoricalDtype):
+        category_codes = df[col_name].cat.codes.to_numpy()
+        processes_in_df = set(df[col_name].cat.categories[np.unique(category_codes[category_codes >= 0])])
+    else: processes_in_df = set(df[col_name].unique())
     return [p for p in PROCESS_MASTER_ORDER if p in processes_in_df]
 
 def add_date_column(df, date_col_name=None):
@@ -126,32 +177,194 @@ def add_date_column(df, date_col_name=None):
     else: df['date'] = pd.NaT
     return df
 
-def get_resampled_data(df, agg_level, metrics_to_sum, group_by_cols=['period', '공장', '공정코드']):
+def sort_by_date(df):
+    """
+    [V107 수정] 'date' 순으로 정렬하고(날짜가 없는 행은 맨 뒤) 위치 인덱스(0..n-1)를 새로 붙입니다.
+    기간 선택(filter_date_range)과 전체 기간 계산(date_bounds)은 이 정렬 순서를 이용해 이진 탐색으로 처리합니다.
+    """
+    if df.empty or 'date' not in df.columns: return df
+    return df.sort_values('date', kind='stable', na_position='last', ignore_index=True)
+
+def filter_date_range(df, start_date, end_date):
+    """[V107 수정] 날짜순으로 정렬된 데이터에서 start_date~end_date(양 끝 포함) 구간을 이진 탐색으로 찾아 복사 없이 위치 슬라이스로 반환합니다."""
+    start = df['date'].searchsorted(pd.Timestamp(start_date), side='left')
+    stop = df['date'].searchsorted(pd.Timestamp(end_date) + pd.Timedelta(days=1), side='left')
+    return df.iloc[start:stop]
+
+def date_bounds(dfs):
+    """[V107 수정] 날짜순으로 정렬된 데이터들의 (가장 이른 날짜, 가장 늦은 날짜)를 각 데이터의 양 끝 값만 보고 구합니다. 날짜가 하나도 없으면 None을 반환합니다."""
+    bounds = []
+    for df in dfs:
+        if df is None or df.empty or 'date' not in df.columns: continue
+        valid_count = df['date'].searchsorted(pd.NaT)
+        if valid_count: bounds.append((df['date'].iloc[0], df['date'].iloc[valid_count - 1]))
+    if not bounds: return None
+    return min(first for first, _ in bounds).date(), max(last for _, last in bounds).date()
+
+def describe_dataset(df):
+    """
+    [V107 수정] 준비된 데이터셋의 메타데이터를 만듭니다: 기간(date_bounds), 공장/제품군/불량명 목록(정렬), 공정코드 목록(PROCESS_MASTER_ORDER 순),
+    빈 값이 있는 컬럼 목록(missing_columns). 데이터셋에 없는 컬럼의 목록은 빈 리스트입니다.
+    """
+    manifest = {'date_bounds': date_bounds([df]), '공정코드': get_process_order(df), 'missing_columns': [col for col in df.columns if df[col].hasnans]}
+    for col in ['공장', '신규분류요약', '불량명']:
+        values = df[col].dropna().unique() if col in df.columns else []
+        try: manifest[col] = sorted(values)
+        except TypeError: manifest[col] = sorted(values, key=str)
+    return manifest
+
+PERIOD_MONTHS = {'월별': 1, '분기별': 3, '반기별': 6, '년도별': 12}
+
+def period_codes(dates, agg_level):
+    """
+    [V107 수정] 날짜(NaT 없음)를 집계 기준별 정수 기간 코드로 바꿉니다. 코드는 1970년 기준 일/주/월/분기/반기/년 번호라 크기 순서가 시간 순서와 같습니다.
+    주간 코드는 월요일에 시작하는 주 번호입니다 (1970-01-01이 목요일이므로 (일 번호 + 3) // 7). 알 수 없는 집계 기준은 일별로 처리합니다.
+    """
+    if agg_level in PERIOD_MONTHS: return np.asarray(dates).astype('datetime64[M]').astype(np.int64) // PERIOD_MONTHS[agg_level]
+    days = np.asarray(dates).astype('datetime64[D]').astype(np.int64)
+    return (days + 3) // 7 if agg_level == '주간별' else days
+
+def period_first_day(codes, agg_level):
+    """[V107 수정] 기간 코드의 첫날을 1970-01-01 기준 일 번호로 반환합니다. 마지막 날은 period_first_day(codes + 1, agg_level) - 1 입니다."""
+    codes = np.asarray(codes, dtype=np.int64)
+    if agg_level in PERIOD_MONTHS: return (codes * PERIOD_MONTHS[agg_level]).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    return codes * 7 - 3 if agg_level == '주간별' else codes
+
+def period_labels(codes, agg_level):
+    """[V107 수정] period_codes의 정수 코드를 화면 표시용 기간 문자열('2024-01-31', '2024-01-29 ~ 2024-02-04', '2024-01', '2024년 1분기', '2024년 상반기', '2024')로 바꿉니다."""
+    codes = np.asarray(codes, dtype=np.int64)
+    if agg_level == '주간별':
+        week_start = pd.to_datetime(period_first_day(codes, agg_level), unit='D')
+        return np.asarray(week_start.strftime('%Y-%m-%d') + ' ~ ' + (week_start + pd.Timedelta(days=6)).strftime('%Y-%m-%d'), dtype=object)
+    if agg_level == '월별': return np.asarray(pd.to_datetime(codes.astype('datetime64[M]')).strftime('%Y-%m'), dtype=object)
+    if agg_level == '분기별': return np.array([f"{code // 4 + 1970}년 {code % 4 + 1}분기" for code in codes], dtype=object)
+    if agg_level == '반기별': return np.array([f"{code // 2 + 1970}년 {'상반기' if code % 2 == 0 else '하반기'}" for code in codes], dtype=object)
+    if agg_level == '년도별': return np.array([f"{code + 1970:04d}" for code in codes], dtype=object)
+    return np.asarray(pd.to_datetime(codes, unit='D').strftime('%Y-%m-%d'), dtype=object)
+
+def get_resampled_data(df, agg_level, metrics_to_sum, group_by_cols=['period', '공장', '공정코드'], cache_key=None):
+    """
+    [V107 수정] 집계 기준(agg_level)별 기간('period')과 group_by_cols로 묶어 metrics_to_sum을 합산합니다.
+    입력을 복사하지 않고 필요한 컬럼만 골라 정수 기간 코드(period_codes)로 묶은 뒤, 표시용 기간 문자열은 집계된 행에만 붙입니다.
+    cache_key(데이터셋 지문, 조회 기간, 추가 필터처럼 df를 식별하는 값)를 주면 (cache_key, 집계 기준, 지표, 묶음 기준)별로 결과를 재사용합니다.
+    """
+    if cache_key is not None: return resample_cached(df, cache_key, agg_level, tuple(metrics_to_sum), tuple(group_by_cols))
     if df.empty or 'date' not in df.columns or df['date'].isnull().all(): return pd.DataFrame()
-    df_copy = df.copy().dropna(subset=['date'])
-    if agg_level == '일별':
-        df_copy['period'] = df_copy['date'].dt.strftime('%Y-%m-%d')
-    elif agg_level == '주간별':
-        start_of_week = df_copy['date'] - pd.to_timedelta(df_copy['date'].dt.dayofweek, unit='d')
-        end_of_week = start_of_week + pd.to_timedelta(6, unit='d')
-        df_copy['period'] = start_of_week.dt.strftime('%Y-%m-%d') + ' ~ ' + end_of_week.dt.strftime('%Y-%m-%d')
-    elif agg_level == '월별':
-        df_copy['period'] = df_copy['date'].dt.strftime('%Y-%m')
-    elif agg_level == '분기별':
-        df_copy['period'] = df_copy['date'].dt.year.astype(str) + '년 ' + df_copy['date'].dt.quarter.astype(str) + '분기'
-    elif agg_level == '반기별':
-        df_copy['period'] = df_copy['date'].dt.year.astype(str) + '년 ' + df_copy['date'].dt.month.apply(lambda m: '상반기' if m <= 6 else '하반기')
-    elif agg_level == '년도별':
-        df_copy['period'] = df_copy['date'].dt.strftime('%Y')
-    else:
-        df_copy['period'] = df_copy['date'].dt.strftime('%Y-%m-%d')
-        
-    valid_group_by_cols = [col for col in group_by_cols if col in df_copy.columns or col == 'period']
-    agg_dict = {metric: 'sum' for metric in metrics_to_sum if metric in df_copy.columns}
-    if not agg_dict:
-        if 'period' not in df_copy.columns: return pd.DataFrame(columns=valid_group_by_cols)
-        return df_copy[valid_group_by_cols].drop_duplicates()
-    return df_copy.groupby(valid_group_by_cols).agg(agg_dict).reset_index()
+    valid_group_by_cols = [col for col in group_by_cols if col in df.columns or col == 'period']
+    agg_dict = {metric: 'sum' for metric in metrics_to_sum if metric in df.columns}
+    has_date = df['date'].notna().to_numpy()
+    used_cols = list(dict.fromkeys([col for col in valid_group_by_cols if col != 'period'] + list(agg_dict)))
+    df_periods = df.loc[has_date, used_cols].assign(period=period_codes(df['date'][has_date], agg_level))
+    if not agg_dict: df_result = df_periods[valid_group_by_cols].drop_duplicates()
+    else: df_result = df_periods.groupby(valid_group_by_cols, observed=True).agg(agg_dict).reset_index()
+    if 'period' in df_result.columns and not df_result.empty:
+        unique_codes, inverse = np.unique(df_result['period'].to_numpy(), return_inverse=True)
+        df_result['period'] = period_labels(unique_codes, agg_level)[inverse]
+    return df_result
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def resample_cached(_df, cache_key, agg_level, metrics_to_sum, group_by_cols):
+    """[V107 수정] get_resampled_data의 캐시 경로입니다. _df는 해시하지 않고 cache_key로 식별합니다."""
+    return get_resampled_data(_df, agg_level, list(metrics_to_sum), list(group_by_cols))
+
+# 데이터셋별 롤업 기준: (묶음 차원 목록, 합산 지표)
+ROLLUP_SPECS = {
+    'yield': ([['공장', '공정코드'], ['공장', '신규분류요약', '공정코드']], ['총_생산수량', '총_양품수량']),
+    'utilization': ([['공장', '공정코드']], ['총_생산수량', '이론상_총_생산량']),
+    'defect': ([['불량명']], ['유형별_불량수량']),
+}
+
+def build_rollups(df, dimension_sets, metrics):
+    """
+    [V107 수정] 기간 추이 차트용 롤업 피라미드를 만듭니다: {차원 튜플: {집계 기준: (기간 코드 'period', 차원..., 지표 합계) 데이터프레임}}.
+    일별 롤업은 원본 행을, 나머지 집계 기준은 일별 롤업을 다시 묶어 만들며 모두 기간 코드 순으로 정렬됩니다.
+    빈 차원 값도 하나의 묶음으로 남겨 두어, 조회할 때 원본 집계와 같은 기준으로 빈 값을 제외할 수 있게 합니다.
+    """
+    if df.empty or 'date' not in df.columns: return {}
+    metrics = [metric for metric in metrics if metric in df.columns]
+    if not metrics: return {}
+    has_date = df['date'].notna().to_numpy()
+    days = period_codes(df['date'][has_date], '일별')
+    rollups = {}
+    for dims in dimension_sets:
+        if not set(dims) <= set(df.columns): continue
+        daily = df.loc[has_date, dims + metrics].assign(period=days).groupby(['period'] + dims, dropna=False, observed=True)[metrics].sum().reset_index()
+        daily_dates = daily['period'].to_numpy().astype('datetime64[D]')
+        levels = {'일별': daily}
+        for agg_level in ['주간별', '월별', '분기별', '반기별', '년도별']:
+            levels[agg_level] = daily.assign(period=period_codes(daily_dates, agg_level)).groupby(['period'] + dims, dropna=False, observed=True)[metrics].sum().reset_index()
+        rollups[tuple(dims)] = levels
+    return rollups
+
+def rollup_resampled_data(rollups, agg_level, start_date, end_date, metrics_to_sum, group_by_cols, filters=None):
+    """
+    [V107 수정] 롤업 피라미드에서 start_date~end_date 기간의 get_resampled_data 결과를 만듭니다.
+    기간 안에 완전히 들어가는 기간은 해당 집계 기준의 롤업 행을, 양 끝에 걸친 일부 기간은 일별 롤업 행을 써서 원본 행을 다시 읽지 않습니다.
+    filters({컬럼: 허용 값 목록})는 롤업 행에 적용합니다. 필요한 차원/지표를 가진 롤업이 없으면 None을 반환합니다.
+    """
+    filters = filters or {}
+    needed = {col for col in group_by_cols if col != 'period'} | set(filters)
+    candidates = [dims for dims, levels in rollups.items() if needed <= set(dims) and set(metrics_to_sum) <= set(levels['일별'].columns)]
+    if not candidates or 'period' not in group_by_cols: return None
+    levels = rollups[min(candidates, key=len)]
+    first_day, last_day = np.datetime64(start_date, 'D').astype(np.int64), np.datetime64(end_date, 'D').astype(np.int64)
+    first_code, last_code = period_codes(np.array([first_day, last_day]).astype('datetime64[D]'), agg_level)
+    if period_first_day(first_code, agg_level) < first_day: first_code += 1
+    if period_first_day(last_code + 1, agg_level) - 1 > last_day: last_code -= 1
+
+    parts, daily_ranges = [], [(first_day, last_day)]
+    if agg_level in levels and first_code <= last_code:
+        level_codes = levels[agg_level]['period']
+        parts.append(levels[agg_level].iloc[level_codes.searchsorted(first_code):level_codes.searchsorted(last_code, side='right')])
+        daily_ranges = [(first_day, period_first_day(first_code, agg_level) - 1), (period_first_day(last_code + 1, agg_level), last_day)]
+    daily, daily_codes = levels['일별'], levels['일별']['period']
+    for range_start, range_end in daily_ranges:
+        if range_start > range_end: continue
+        edge_rows = daily.iloc[daily_codes.searchsorted(range_start):daily_codes.searchsorted(range_end, side='right')]
+        parts.append(edge_rows.assign(period=period_codes(edge_rows['period'].to_numpy().astype('datetime64[D]'), agg_level)))
+
+    df_periods = pd.concat(parts, ignore_index=True)
+    for col, values in filters.items(): df_periods = df_periods[df_periods[col].isin(values)]
+    if df_periods.empty: return pd.DataFrame()
+    df_result = df_periods.groupby(list(group_by_cols), observed=True)[list(metrics_to_sum)].sum().reset_index()
+    unique_codes, inverse = np.unique(df_result['period'].to_numpy(), return_inverse=True)
+    df_result['period'] = period_labels(unique_codes, agg_level)[inverse]
+    return df_result
+
+def composite_yield(df, group_cols, cache_key=None):
+    """
+    [V107 수정] 공정별 수율(총_양품수량 / 총_생산수량, 0으로 나누면 1.0)의 곱인 종합 수율을 group_cols별로 계산합니다.
+    df는 group_cols × 공정코드보다 세분된 집계여도 되며(예: 제품군별 집계로 선택 제품군 합산 수율 계산), 먼저 group_cols × 공정코드로 합산합니다.
+    곱은 |수율|의 로그 합으로 계산하고, 0인 공정이 있으면 0, 음수 공정 수가 홀수면 음수로 부호를 붙입니다.
+    (group_cols + ['종합수율(%)'], group_cols + ['공정코드', '개별수율(%)', '수율손실기여(%)']) 두 데이터프레임을 반환합니다.
+    수율손실기여(%)는 공정의 -log(수율)이 묶음 전체 -log(종합 수율)에서 차지하는 비율입니다 (손실이 없으면 0, 0 이하 수율이 있는 묶음은 NaN).
+    cache_key(get_resampled_data의 cache_key와 같이 df를 식별하는 값)를 주면 (cache_key, group_cols)별로 결과를 재사용합니다.
+    """
+    if cache_key is not None: return composite_yield_cached(df, cache_key, tuple(group_cols))
+    group_cols = list(group_cols)
+    df_process = df.groupby(group_cols + ['공정코드'], observed=True)[['총_생산수량', '총_양품수량']].sum().reset_index()
+    with pd.option_context('mode.use_inf_as_na', True): process_yield = (df_process['총_양품수량'] / df_process['총_생산수량']).fillna(1.0).to_numpy(dtype=float)
+    grouper = df_process.groupby(group_cols, observed=True)
+    group_ids, group_count = grouper.ngroup().to_numpy(), grouper.ngroups
+    log_yield = np.log(np.abs(np.where(process_yield == 0, 1.0, process_yield)))
+    has_zero = np.bincount(group_ids, weights=process_yield == 0, minlength=group_count) > 0
+    negative_count = np.bincount(group_ids, weights=process_yield < 0, minlength=group_count)
+    log_sum = np.bincount(group_ids, weights=log_yield, minlength=group_count)
+    composite = np.where(has_zero, 0.0, np.where(negative_count % 2 == 1, -1.0, 1.0) * np.exp(log_sum))
+
+    df_composite = grouper.size().index.to_frame(index=False)
+    df_composite['종합수율(%)'] = composite * 100
+    df_contributions = df_process[group_cols + ['공정코드']].assign(**{'개별수율(%)': process_yield * 100})
+    valid_group = ~has_zero & (negative_count == 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(log_sum[group_ids] < 0, log_yield / log_sum[group_ids] * 100 + 0.0, 0.0)
+    df_contributions['수율손실기여(%)'] = np.where(valid_group[group_ids], share, np.nan)
+    return df_composite, df_contributions
+
+@st.cache_data(max_entries=200, show_spinner=False)
+def composite_yield_cached(_df, cache_key, group_cols):
+    """[V107 수정] composite_yield의 캐시 경로입니다. _df는 해시하지 않고 cache_key로 식별합니다."""
+    return composite_yield(_df, list(group_cols))
 
 def generate_summary_text(df, agg_level, factory_name="전체"):
     agg_map = {'일별': '일', '주간별': '주', '월별': '월', '분기별': '분기', '반기별': '반기', '년도별': '년'}
@@ -199,7 +412,7 @@ def plot_pareto_chart(df, title, defect_qty_col='유형별_불량수량'):
     if df.empty or defect_qty_col not in df.columns: 
         st.info("차트를 그릴 데이터가 없습니다.")
         return
-    df_agg = df.groupby('불량명')[defect_qty_col].sum().reset_index()
+    df_agg = df.groupby('불량명', observed=True)[defect_qty_col].sum().reset_index()
     df_agg = df_agg.sort_values(by=defect_qty_col, ascending=False)
     df_agg = df_agg[df_agg[defect_qty_col] > 0] 
     if df_agg.empty: 
@@ -245,33 +458,41 @@ def reset_filters(min_data_date, max_data_date):
 # --- 대시보드 UI 시작 ---
 st.title("지능형 생산 대시보드 V105 (차트 축 자동 범위 최적화 V4)")
 
-all_data = load_all_data()
+all_data, load_status, data_manifest, data_rollups = load_all_data()
 df_target_orig, target_filename = all_data.get('target', (pd.DataFrame(), None)); df_yield_orig, yield_filename = all_data.get('yield', (pd.DataFrame(), None)); df_utilization_orig, util_filename = all_data.get('utilization', (pd.DataFrame(), None)); df_low_util_orig, low_util_filename = all_data.get('low_util', (pd.DataFrame(), None)); df_defect_orig, defect_filename = all_data.get('defect', (pd.DataFrame(), None))
 
-if not df_target_orig.empty: df_target_orig = normalize_process_codes(add_date_column(df_target_orig))
-if not df_yield_orig.empty: df_yield_orig = normalize_process_codes(add_date_column(df_yield_orig))
-if not df_utilization_orig.empty: df_utilization_orig = normalize_process_codes(add_date_column(df_utilization_orig))
-if not df_defect_orig.empty: df_defect_orig = normalize_process_codes(add_date_column(df_defect_orig))
-
 if 'date_range' not in st.session_state or 'agg_level' not in st.session_state:
-    all_dfs = [df_target_orig, df_yield_orig, df_utilization_orig, df_defect_orig]
-    all_dates = pd.concat([d['date'] for d in all_dfs if d is not None and not d.empty and 'date' in d.columns]).dropna()
-    min_date_global, max_date_global = (all_dates.min().date(), all_dates.max().date()) if not all_dates.empty else (date.today(), date.today())
+    min_date_global, max_date_global = data_manifest['date_bounds'] or (date.today(), date.today())
     if 'date_range' not in st.session_state: st.session_state.date_range = (min_date_global, max_date_global)
     if 'agg_level' not in st.session_state: st.session_state.agg_level = '월별'
 
-st.sidebar.header("로딩된 파일 정보"); st.sidebar.info(f"목표: {target_filename}" if target_filename else "파일 없음"); st.sidebar.info(f"수율: {yield_filename}" if yield_filename else "파일 없음"); st.sidebar.info(f"가동률: {util_filename}" if util_filename else "파일 없음"); st.sidebar.info(f"저가동: {low_util_filename}" if low_util_filename else "파일 없음"); st.sidebar.info(f"불량: {defect_filename}" if defect_filename else "파일 없음")
+st.sidebar.header("로딩된 파일 정보")
+for label, filename, status in [("목표", target_filename, load_status['target']), ("수율", yield_filename, load_status['yield']), ("가동률", util_filename, load_status['utilization']), ("저가동", low_util_filename, load_status['low_util']), ("불량", defect_filename, load_status['defect'])]:
+    if not filename: st.sidebar.info("파일 없음")
+    elif status == '새로 로딩': st.sidebar.success(f"{label}: {filename} (새로 로딩)")
+    else: st.sidebar.info(f"{label}: {filename} (캐시)")
 
 tab_list = ["종합 분석", "목표 달성률", "수율 분석", "불량유형별 분석", "가동률 분석", "저가동 설비"]
 selected_tab = st.radio("메인 네비게이션", tab_list, key='main_tab_selector', horizontal=True, label_visibility='collapsed')
 
+def dataset_cache_key(keys, start_date, end_date, *filters):
+    """[V107 수정] get_resampled_data의 cache_key를 만듭니다: 원본 데이터셋들의 파일 지문 + 조회 기간 + 추가로 적용한 필터 값."""
+    return tuple(data_manifest['datasets'][key].get('fingerprint') for key in keys) + (start_date, end_date) + filters
+
+def resample_dataset(key, df, agg_level, metrics_to_sum, group_by_cols, start_date, end_date, filters=None):
+    """
+    [V107 수정] 데이터셋 key의 기간 추이를 롤업 피라미드에서 만들고(rollup_resampled_data), 맞는 롤업이 없으면 df를 직접 집계합니다.
+    df는 key 데이터셋을 조회 기간과 filters({컬럼: 허용 값 목록})로 거른 데이터여야 합니다.
+    """
+    df_result = rollup_resampled_data(data_rollups.get(key, {}), agg_level, start_date, end_date, metrics_to_sum, group_by_cols, filters)
+    if df_result is not None: return df_result
+    return get_resampled_data(df, agg_level, metrics_to_sum, group_by_cols=group_by_cols, cache_key=dataset_cache_key([key], start_date, end_date, *sorted((col, tuple(values)) for col, values in (filters or {}).items())))
+
 def create_shared_filter_controls(df_for_current_tab):
     """
     모든 탭에서 공유되는 필터 컨트롤을 생성하고 필터링된 데이터프레임을 반환합니다.
     """
-    all_dfs = [df_target_orig, df_yield_orig, df_utilization_orig, df_defect_orig]
-    all_dates = pd.concat([d['date'] for d in all_dfs if d is not None and not d.empty and 'date' in d.columns]).dropna()
-    min_date_global, max_date_global = (all_dates.min().date(), all_dates.max().date()) if not all_dates.empty else (date(2000, 1, 1), date.today())
+    min_date_global, max_date_global = data_manifest['date_bounds'] or (date(2000, 1, 1), date.today())
 
     header_cols = st.columns([1, 1])
     with header_cols[0]:
@@ -306,8 +527,7 @@ def create_shared_filter_controls(df_for_current_tab):
     if df_for_current_tab.empty or 'date' not in df_for_current_tab.columns or df_for_current_tab['date'].isnull().all():
         return pd.DataFrame(), final_start_date, final_end_date, agg_level
         
-    mask = (df_for_current_tab['date'].dt.date >= final_start_date) & (df_for_current_tab['date'].dt.date <= final_end_date)
-    return df_for_current_tab[mask].copy(), final_start_date, final_end_date, agg_level
+    return filter_date_range(df_for_current_tab, final_start_date, final_end_date), final_start_date, final_end_date, agg_level
 
 def aggregate_overall_data(df, analysis_type):
     if df.empty: return pd.DataFrame()
@@ -317,7 +537,7 @@ def aggregate_overall_data(df, analysis_type):
     if not metrics: return pd.DataFrame()
     agg_dict = {col: 'sum' for col in metrics['sums'] if col in df.columns};
     if not agg_dict: return pd.DataFrame()
-    agg_df = df.groupby(group_cols).agg(agg_dict).reset_index()
+    agg_df = df.groupby(group_cols, observed=True).agg(agg_dict).reset_index()
     rate_name, sums = metrics['rate'], metrics['sums']
     c1, c2 = sums if analysis_type != 'utilization' else (sums[1], sums[0])
     with pd.option_context('mode.use_inf_as_na', True): agg_df[rate_name] = (100 * agg_df[c2] / agg_df[c1]).fillna(0)
@@ -342,26 +562,26 @@ if selected_tab == "목표 달성률":
         df_target_filtered, start_date, end_date, agg_level = create_shared_filter_controls(df_target_orig)
         if df_target_filtered.empty: st.info("선택된 기간에 목표 데이터가 없습니다.")
         else:
-            mask_yield = (df_yield_orig['date'].dt.date >= start_date) & (df_yield_orig['date'].dt.date <= end_date); df_yield_filtered = df_yield_orig.loc[mask_yield].copy()
+            df_yield_filtered = filter_date_range(df_yield_orig, start_date, end_date)
             if df_yield_filtered.empty: st.info("선택된 기간에 수율 데이터가 없어, 양품 기반 달성률을 계산할 수 없습니다.")
             else:
-                key_cols = ['date', '공장', '공정코드']; target_agg_day = df_target_filtered.groupby(key_cols).agg(목표_총_생산량=('목표_총_생산량', 'sum')).reset_index(); yield_agg_day = df_yield_filtered.groupby(key_cols).agg(총_생산수량=('총_생산수량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
+                key_cols = ['date', '공장', '공정코드']; target_agg_day = df_target_filtered.groupby(key_cols, observed=True).agg(목표_총_생산량=('목표_총_생산량', 'sum')).reset_index(); yield_agg_day = df_yield_filtered.groupby(key_cols, observed=True).agg(총_생산수량=('총_생산수량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
                 df_merged = pd.merge(target_agg_day, yield_agg_day, on=key_cols, how='outer'); df_merged.fillna({'총_양품수량': 0, '총_생산수량': 0, '목표_총_생산량': 0}, inplace=True); main_col, side_col = st.columns([2.8, 1])
                 with main_col:
                     st.subheader("핵심 지표 요약 (완제품 제조 기준, 양품 기반 달성률)"); df_kpi_base = df_merged[df_merged['공정코드'] == '[80] 누수/규격검사']
                     if not df_kpi_base.empty:
-                        df_kpi_agg_factory = df_kpi_base.groupby('공장').agg(목표_총_생산량=('목표_총_생산량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
+                        df_kpi_agg_factory = df_kpi_base.groupby('공장', observed=True).agg(목표_총_생산량=('목표_총_생산량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
                         with pd.option_context('mode.use_inf_as_na', True): df_kpi_agg_factory['달성률(%)'] = (100 * df_kpi_agg_factory['총_양품수량'] / df_kpi_agg_factory['목표_총_생산량']).fillna(0)
                         target_kpi, good_kpi = df_kpi_agg_factory['목표_총_생산량'].sum(), df_kpi_agg_factory['총_양품수량'].sum(); rate_kpi = (good_kpi / target_kpi * 100) if target_kpi > 0 else 0
                         kpi1, kpi2, kpi3 = st.columns(3); kpi1.metric("완제품 목표", f"{target_kpi:,.0f} 개"); kpi2.metric("완제품 양품 실적", f"{good_kpi:,.0f} 개"); kpi3.metric("완제품 달성률", f"{rate_kpi:.2f} %")
                         st.divider(); st.markdown("##### 공장별 최종 완제품 달성률 (양품 기준)"); factory_kpi_cols = st.columns(len(df_kpi_agg_factory) or [1])
                         for i, row in df_kpi_agg_factory.iterrows():
                             with factory_kpi_cols[i]: st.metric(label=row['공장'], value=f"{row['달성률(%)']:.2f}%"); st.markdown(f"<p style='font-size:0.8rem;color:grey;margin-top:-8px;'>목표:{row['목표_총_생산량']:,.0f}<br>양품실적:{row['총_양품수량']:,.0f}</p>", unsafe_allow_html=True)
-                    st.divider(); st.subheader(f"{agg_level} 완제품 달성률 추이 (양품 기준)"); df_resampled = get_resampled_data(df_merged, agg_level, ['목표_총_생산량', '총_양품수량']); df_trend = df_resampled[df_resampled['공정코드'] == '[80] 누수/규격검사'].copy()
+                    st.divider(); st.subheader(f"{agg_level} 완제품 달성률 추이 (양품 기준)"); df_resampled = get_resampled_data(df_merged, agg_level, ['목표_총_생산량', '총_양품수량'], cache_key=dataset_cache_key(['target', 'yield'], start_date, end_date)); df_trend = df_resampled[df_resampled['공정코드'] == '[80] 누수/규격검사'].copy()
                     if not df_trend.empty:
                         with pd.option_context('mode.use_inf_as_na', True): df_trend['달성률(%)'] = (100 * df_trend['총_양품수량'] / df_trend['목표_총_생산량']).fillna(0)
                         fig_trend = px.line(df_trend.sort_values('period'), x='period', y='달성률(%)', color='공장', title=f'<b>{agg_level} 완제품 제조 달성률 추이 (양품 기준)</b>', markers=True, text='달성률(%)'); fig_trend.update_traces(texttemplate='%{text:.2f}%', textposition='top center', textfont=dict(size=16, color='black')); fig_trend.update_xaxes(type='category', categoryorder='array', categoryarray=sorted(df_trend['period'].unique())); st.plotly_chart(fig_trend, use_container_width=True)
-                    df_total_agg = df_merged.groupby(['공장', '공정코드']).agg(목표_총_생산량=('목표_총_생산량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
+                    df_total_agg = df_merged.groupby(['공장', '공정코드'], observed=True).agg(목표_총_생산량=('목표_총_생산량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
                     with pd.option_context('mode.use_inf_as_na', True): df_total_agg['달성률(%)'] = (100 * df_total_agg['총_양품수량'] / df_total_agg['목표_총_생산량']).fillna(0)
                     df_total_agg = df_total_agg[df_total_agg['목표_총_생산량'] > 0]; st.divider(); st.subheader("공장/공정별 현황 (전체 기간 집계)")
                     chart_process_order = get_process_order(df_total_agg)
@@ -374,24 +594,24 @@ if selected_tab == "목표 달성률":
                     df_display = df_display.rename(columns={'date': '일자', '목표_총_생산량': '목표 생산량', '총_생산수량': '총 생산량', '총_양품수량': '총 양품수량'}); st.dataframe(df_display[['일자', '공장', '공정코드', '목표 생산량', '총 생산량', '총 양품수량', '달성률(%)']].sort_values(by=['일자', '공장', '공정코드']), use_container_width=True, height=500)
 
 elif selected_tab == "수율 분석":
-    df_filtered, _, _, agg_level = create_shared_filter_controls(df_yield_orig)
+    df_filtered, start_date, end_date, agg_level = create_shared_filter_controls(df_yield_orig)
     if not df_filtered.empty:
         main_col, side_col = st.columns([2.8, 1])
         with main_col:
             # --- 공장별 종합 수율 추이 ---
-            df_resampled_factory = get_resampled_data(df_filtered, agg_level, ['총_생산수량', '총_양품수량'], group_by_cols=['period', '공장', '공정코드'])
+            df_resampled_factory = resample_dataset('yield', df_filtered, agg_level, ['총_생산수량', '총_양품수량'], ['period', '공장', '공정코드'], start_date, end_date)
             if not df_resampled_factory.empty:
                 st.subheader(f"{agg_level} 공장별 종합 수율 추이")
-                with pd.option_context('mode.use_inf_as_na', True): df_resampled_factory['개별수율'] = (df_resampled_factory['총_양품수량'] / df_resampled_factory['총_생산수량']).fillna(1.0)
-                factory_yield_trend = df_resampled_factory.groupby(['period', '공장'])['개별수율'].prod().reset_index()
-                factory_yield_trend['종합수율(%)'] = factory_yield_trend.pop('개별수율') * 100
+                factory_yield_trend, factory_yield_contributions = composite_yield(df_resampled_factory, ['period', '공장'], cache_key=dataset_cache_key(['yield'], start_date, end_date, agg_level, '전체', ('period', '공장', '공정코드')))
                 fig_factory_trend = px.line(factory_yield_trend.sort_values('period'), x='period', y='종합수율(%)', color='공장', title=f'<b>{agg_level} 공장별 종합 수율 추이</b>', markers=True, text='종합수율(%)')
                 fig_factory_trend.update_traces(texttemplate='%{text:.2f}%', textposition='top center', textfont=dict(size=16, color='black'))
                 fig_factory_trend.update_xaxes(type='category', categoryorder='array', categoryarray=sorted(factory_yield_trend['period'].unique()))
                 st.plotly_chart(fig_factory_trend, use_container_width=True)
+                with st.expander("공정별 수율 손실 기여도 (종합 수율을 낮춘 공정 확인)"):
+                    st.dataframe(factory_yield_contributions.sort_values(by=['period', '공장', '수율손실기여(%)'], ascending=[False, True, False]).round(2), use_container_width=True, height=400)
 
             st.divider()
-            
+
             # --- 제품군별 종합 수율 추이 ---
             st.subheader(f"{agg_level} 제품군별 종합 수율 추이")
             
@@ -410,15 +630,11 @@ elif selected_tab == "수율 분석":
             else:
                 df_yield_factory_filtered = df_filtered[df_filtered['공장'] == selected_factory].copy()
             
-            df_resampled_product = get_resampled_data(df_yield_factory_filtered, agg_level, ['총_생산수량', '총_양품수량'], group_by_cols=['period', '신규분류요약', '공정코드'])
+            df_resampled_product = resample_dataset('yield', df_yield_factory_filtered, agg_level, ['총_생산수량', '총_양품수량'], ['period', '신규분류요약', '공정코드'], start_date, end_date, filters={'공장': [selected_factory]} if selected_factory != '전체' else None)
 
             if not df_resampled_product.empty and '신규분류요약' in df_resampled_product.columns:
-                with pd.option_context('mode.use_inf_as_na', True): 
-                    df_resampled_product['개별수율'] = (df_resampled_product['총_양품수량'] / df_resampled_product['총_생산수량']).fillna(1.0)
-                
-                product_yield_trend = df_resampled_product.groupby(['period', '신규분류요약'])['개별수율'].prod().reset_index()
-                product_yield_trend = product_yield_trend.rename(columns={'개별수율': '종합수율(%)'})
-                product_yield_trend['종합수율(%)'] *= 100
+                product_yield_key = dataset_cache_key(['yield'], start_date, end_date, agg_level, selected_factory, ('period', '신규분류요약', '공정코드'))
+                product_yield_trend, _ = composite_yield(df_resampled_product, ['period', '신규분류요약'], cache_key=product_yield_key)
                 
                 all_product_groups = sorted(df_resampled_product['신규분류요약'].dropna().unique())
 
@@ -454,13 +670,7 @@ elif selected_tab == "수율 분석":
                     if selected_product_groups:
                         if combine_yield:
                             df_filtered_for_combine = df_resampled_product[df_resampled_product['신규분류요약'].isin(selected_product_groups)]
-                            df_combined = df_filtered_for_combine.groupby(['period', '공정코드']).agg(총_생산수량=('총_생산수량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
-                            with pd.option_context('mode.use_inf_as_na', True): 
-                                df_combined['개별수율'] = (df_combined['총_양품수량'] / df_combined['총_생산수량']).fillna(1.0)
-                            
-                            df_to_plot = df_combined.groupby('period')['개별수율'].prod().reset_index()
-                            df_to_plot = df_to_plot.rename(columns={'개별수율': '종합수율(%)'})
-                            df_to_plot['종합수율(%)'] *= 100
+                            df_to_plot, _ = composite_yield(df_filtered_for_combine, ['period'], cache_key=product_yield_key + (tuple(selected_product_groups),))
                             
                             if not df_to_plot.empty:
                                 fig_product_trend = px.line(df_to_plot.sort_values('period'), x='period', y='종합수율(%)', title=f'<b>{agg_level} 선택 제품군 통합 수율 추이 ({selected_factory})</b>', markers=True, text='종합수율(%)')
@@ -494,16 +704,13 @@ elif selected_tab == "불량유형별 분석":
     if df_defect_orig.empty:
         st.info("해당 분석을 위해서는 '불량실적현황(최적화)' 데이터가 필요합니다.")
     else:
-        df_defect_filtered, _, _, agg_level = create_shared_filter_controls(df_defect_orig)
+        df_defect_filtered, start_date, end_date, agg_level = create_shared_filter_controls(df_defect_orig)
 
         if df_defect_filtered.empty:
             st.info("선택된 기간에 분석에 필요한 불량 데이터가 없습니다.")
         elif '생산수량' not in df_defect_filtered.columns:
             st.error("불량 데이터 파일에 '생산수량' 컬럼이 없어 불량률을 계산할 수 없습니다.")
         else:
-            if '유형별_불량수량' in df_defect_filtered.columns:
-                df_defect_filtered['유형별_불량수량'] = pd.to_numeric(df_defect_filtered['유형별_불량수량'], errors='coerce').fillna(0)
-            
             main_col, side_col = st.columns([2.8, 1])
 
             with main_col:
@@ -539,7 +746,7 @@ elif selected_tab == "불량유형별 분석":
                             st.rerun()
 
                     # 동적 필터링
-                    selections = {}
+                    selections, filter_options = {}, {}
                     filtered_df = filter_data_source.copy()
                     for i, key in enumerate(available_filters):
                         # 앞쪽 필터 선택값에 따라 옵션 제한
@@ -549,7 +756,7 @@ elif selected_tab == "불량유형별 분석":
                                 selected = st.session_state.get(f"ms_{pk}", [])
                                 if selected:
                                     filtered_df = filtered_df[filtered_df[pk].isin(selected)]
-                        options = sorted(filtered_df[key].dropna().unique())
+                        options = filter_options[key] = sorted(filtered_df[key].dropna().unique())
                         selections[key] = st.multiselect(
                             filter_options_map[key], options, default=st.session_state.get(f"ms_{key}", options),
                             key=f"ms_{key}", label_visibility="collapsed", placeholder=filter_options_map[key]
@@ -581,6 +788,12 @@ elif selected_tab == "불량유형별 분석":
             prod_key_cols = ['date', '공장', '신규분류요약', '사출기계코드', '공정기계코드', '생산수량']
             available_prod_key_cols = [col for col in prod_key_cols if col in df_display.columns]
             prod_data_source = df_display[available_prod_key_cols].drop_duplicates()
+            display_filters = (tuple((key, tuple(values)) for key, values in selections.items()), tuple(st.session_state.selected_defects))
+            # 세부 필터가 행을 하나도 거르지 않으면(선택 안 함 또는 빈 값 없는 컬럼에서 전체 선택) 불량명 롤업을 사용
+            detail_filters_inactive = all(not values or (set(values) >= set(filter_options[key]) and key not in data_manifest['datasets']['defect']['missing_columns']) for key, values in selections.items())
+            def resample_defects(group_by_cols):
+                if detail_filters_inactive: return resample_dataset('defect', df_display, agg_level, ['유형별_불량수량'], group_by_cols, start_date, end_date, filters={'불량명': st.session_state.selected_defects})
+                return get_resampled_data(df_display, agg_level, ['유형별_불량수량'], group_by_cols=group_by_cols, cache_key=dataset_cache_key(['defect'], start_date, end_date, 'display', display_filters))
 
             st.divider()
             st.subheader("주요 불량 원인 분석 (파레토)", anchor=False)
@@ -591,8 +804,8 @@ elif selected_tab == "불량유형별 분석":
 
             st.divider()
             st.subheader(f"{agg_level} 총 불량 수량 및 불량률 추이", anchor=False)
-            total_defect_resampled = get_resampled_data(df_display, agg_level, ['유형별_불량수량'], group_by_cols=['period'])
-            total_prod_resampled = get_resampled_data(prod_data_source, agg_level, ['생산수량'], group_by_cols=['period']).rename(columns={'생산수량': '총_생산수량'})
+            total_defect_resampled = resample_defects(['period'])
+            total_prod_resampled = get_resampled_data(prod_data_source, agg_level, ['생산수량'], group_by_cols=['period'], cache_key=dataset_cache_key(['defect'], start_date, end_date, 'production', display_filters)).rename(columns={'생산수량': '총_생산수량'})
             
             if not total_defect_resampled.empty:
                 combo_data = pd.merge(total_defect_resampled, total_prod_resampled, on='period', how='outer').fillna(0)
@@ -627,8 +840,8 @@ elif selected_tab == "불량유형별 분석":
             st.divider()
             st.subheader(f"{agg_level} 불량 유형별 불량률 추이", anchor=False)
             
-            prod_resampled = get_resampled_data(prod_data_source, agg_level, ['생산수량'], group_by_cols=['period']).rename(columns={'생산수량': '기간별_총생산량'})
-            defect_resampled = get_resampled_data(df_display, agg_level, ['유형별_불량수량'], group_by_cols=['period', '불량명'])
+            prod_resampled = get_resampled_data(prod_data_source, agg_level, ['생산수량'], group_by_cols=['period'], cache_key=dataset_cache_key(['defect'], start_date, end_date, 'production', display_filters)).rename(columns={'생산수량': '기간별_총생산량'})
+            defect_resampled = resample_defects(['period', '불량명'])
             
             if not defect_resampled.empty:
                 trend_final_data = pd.merge(defect_resampled, prod_resampled, on='period', how='left')
@@ -650,7 +863,7 @@ elif selected_tab == "불량유형별 분석":
                     st.markdown("<div style='padding-top: 28px;'></div>", unsafe_allow_html=True)
                     show_labels = st.toggle("차트 라벨 표시", value=True)
 
-                avg_defect_rates = trend_final_data.groupby('불량명')['불량률(%)'].mean().nlargest(top_n_defects).index.tolist()
+                avg_defect_rates = trend_final_data.groupby('불량명', observed=True)['불량률(%)'].mean().nlargest(top_n_defects).index.tolist()
                 trend_final_data_top_n = trend_final_data[trend_final_data['불량명'].isin(avg_defect_rates)]
                 
                 fig_trend_rate = px.line(trend_final_data_top_n.sort_values('period'), x='period', y='불량률(%)', color='불량명', title=f"<b>{agg_level} 불량 유형별 불량률 추이</b>", markers=True, text='불량률(%)' if show_labels else None, height=600)
@@ -668,15 +881,15 @@ elif selected_tab == "불량유형별 분석":
                 st.dataframe(df_display, use_container_width=True, height=500)
 
 elif selected_tab == "가동률 분석":
-    df_filtered, _, _, agg_level = create_shared_filter_controls(df_utilization_orig)
+    df_filtered, start_date, end_date, agg_level = create_shared_filter_controls(df_utilization_orig)
     if not df_filtered.empty:
         df_total_agg = aggregate_overall_data(df_filtered, 'utilization'); main_col, side_col = st.columns([2.8, 1]);
         with main_col:
-            df_resampled_util = get_resampled_data(df_filtered, agg_level, ['총_생산수량', '이론상_총_생산량'], group_by_cols=['period', '공장', '공정코드'])
+            df_resampled_util = resample_dataset('utilization', df_filtered, agg_level, ['총_생산수량', '이론상_총_생산량'], ['period', '공장', '공정코드'], start_date, end_date)
             if not df_resampled_util.empty:
                 st.subheader(f"{agg_level} 공장별 가동률 추이")
                 with pd.option_context('mode.use_inf_as_na', True): df_resampled_util['평균_가동률'] = (100 * df_resampled_util['총_생산수량'] / df_resampled_util['이론상_총_생산량']).fillna(0)
-                df_trend = df_resampled_util.groupby(['period', '공장'])['평균_가동률'].mean().reset_index()
+                df_trend = df_resampled_util.groupby(['period', '공장'], observed=True)['평균_가동률'].mean().reset_index()
                 fig_trend = px.line(df_trend.sort_values('period'), x='period', y='평균_가동률', color='공장', title=f'<b>{agg_level} 공장 가동률 추이</b>', markers=True, text='평균_가동률')
                 fig_trend.update_traces(texttemplate='%{text:.2f}%', textposition='top center', textfont=dict(size=16, color='black')); fig_trend.update_xaxes(type='category', categoryorder='array', categoryarray=sorted(df_trend['period'].unique())); st.plotly_chart(fig_trend, use_container_width=True)
             all_factories_in_period = sorted(df_filtered['공장'].unique())
@@ -688,8 +901,7 @@ elif selected_tab == "종합 분석":
     df_filtered, start_date, end_date, agg_level = create_shared_filter_controls(df_target_orig)
     if df_filtered.empty or df_yield_orig.empty: st.info("분석에 필요한 목표 달성률 또는 수율 데이터가 없습니다.")
     else:
-        mask_yield = (df_yield_orig['date'].dt.date >= start_date) & (df_yield_orig['date'].dt.date <= end_date)
-        df_yield_filt = df_yield_orig[mask_yield].copy()
+        df_yield_filt = filter_date_range(df_yield_orig, start_date, end_date)
 
         # 데이터 처리
         compare_factories = st.session_state.get('compare_factories', False)
@@ -705,14 +917,12 @@ elif selected_tab == "종합 분석":
         bar_data, line_data = pd.DataFrame(), pd.DataFrame()
         if not df_yield_filt_factory.empty:
             group_by_cols = ['period', '공장', '공정코드'] if compare_factories else ['period', '공정코드']
-            df_yield_resampled = get_resampled_data(df_yield_filt_factory, agg_level, ['총_생산수량', '총_양품수량'], group_by_cols=group_by_cols)
+            df_yield_resampled = resample_dataset('yield', df_yield_filt_factory, agg_level, ['총_생산수량', '총_양품수량'], group_by_cols, start_date, end_date, filters={'공장': [active_factory]} if active_factory != '전체' else None)
             df_final_yield_filtered = df_yield_resampled[df_yield_resampled['공정코드'] == '[80] 누수/규격검사']
             bar_group_cols = ['period', '공장'] if compare_factories else ['period']
-            bar_data = df_final_yield_filtered.groupby(bar_group_cols)['총_양품수량'].sum().reset_index().rename(columns={'총_양품수량': '총_생산수량'})
-            with pd.option_context('mode.use_inf_as_na', True): df_yield_resampled['개별공정수율'] = (df_yield_resampled['총_양품수량'] / df_yield_resampled['총_생산수량']).fillna(1.0)
+            bar_data = df_final_yield_filtered.groupby(bar_group_cols, observed=True)['총_양품수량'].sum().reset_index().rename(columns={'총_양품수량': '총_생산수량'})
             line_group_cols = ['period', '공장'] if compare_factories else ['period']
-            line_data = df_yield_resampled.groupby(line_group_cols)['개별공정수율'].prod().reset_index(name='종합수율(%)')
-            line_data['종합수율(%)'] *= 100
+            line_data, _ = composite_yield(df_yield_resampled, line_group_cols, cache_key=dataset_cache_key(['yield'], start_date, end_date, agg_level, active_factory, tuple(group_by_cols)))
         else:
             bar_data = pd.DataFrame(columns=['period', '총_생산수량'])
             line_data = pd.DataFrame(columns=['period', '종합수율(%)'])
@@ -727,7 +937,7 @@ elif selected_tab == "종합 분석":
             # 모든 컨트롤을 브리핑 위로 이동
             control_cols_1 = st.columns(3)
             with control_cols_1[0]:
-                all_factories = ['전체'] + sorted(df_yield_orig['공장'].unique())
+                all_factories = ['전체'] + data_manifest['datasets']['yield']['공장']
                 st.selectbox(
                     "공장 선택", options=all_factories, key="overall_factory_select",
                     disabled=st.session_state.get('compare_factories', False)
@@ -799,7 +1009,7 @@ elif selected_tab == "종합 분석":
             st.subheader(f"{agg_level} 제품군별 완제품 제조 실적 및 종합 수율", anchor=False)
 
             # 공장 선택 필터
-            pg_all_factories = ['전체'] + sorted(df_yield_orig['공장'].unique())
+            pg_all_factories = ['전체'] + data_manifest['datasets']['yield']['공장']
             pg_selected_factory = st.selectbox(
                 "분석 공장 선택", 
                 options=pg_all_factories, 
@@ -845,27 +1055,23 @@ elif selected_tab == "종합 분석":
                     combine_pg = st.checkbox("선택항목 합쳐서 보기", key="pg_combine_yield", help="선택한 제품군들의 실적을 합산하여 단일 종합 수율 및 생산 실적 추이를 분석합니다.")
 
                     if selected_product_groups_pg:
-                        df_resampled_pg = get_resampled_data(df_yield_pg_filtered, agg_level, ['총_생산수량', '총_양품수량'], group_by_cols=['period', '신규분류요약', '공정코드'])
+                        pg_yield_key = dataset_cache_key(['yield'], start_date, end_date, agg_level, pg_selected_factory, ('period', '신규분류요약', '공정코드'))
+                        df_resampled_pg = resample_dataset('yield', df_yield_pg_filtered, agg_level, ['총_생산수량', '총_양품수량'], ['period', '신규분류요약', '공정코드'], start_date, end_date, filters={'공장': [pg_selected_factory]} if pg_selected_factory != '전체' else None)
                         df_resampled_pg_filtered = df_resampled_pg[df_resampled_pg['신규분류요약'].isin(selected_product_groups_pg)]
 
                         if not df_resampled_pg_filtered.empty:
                             df_to_plot_pg = pd.DataFrame()
                             if combine_pg:
-                                bar_combined = df_resampled_pg_filtered[df_resampled_pg_filtered['공정코드'] == '[80] 누수/규격검사'].groupby('period')['총_양품수량'].sum().reset_index().rename(columns={'총_양품수량': '완제품_제조개수'})
+                                bar_combined = df_resampled_pg_filtered[df_resampled_pg_filtered['공정코드'] == '[80] 누수/규격검사'].groupby('period', observed=True)['총_양품수량'].sum().reset_index().rename(columns={'총_양품수량': '완제품_제조개수'})
                                 
-                                df_yield_combined_base = df_resampled_pg_filtered.groupby(['period', '공정코드']).agg(총_생산수량=('총_생산수량', 'sum'), 총_양품수량=('총_양품수량', 'sum')).reset_index()
-                                with pd.option_context('mode.use_inf_as_na', True): df_yield_combined_base['개별수율'] = (df_yield_combined_base['총_양품수량'] / df_yield_combined_base['총_생산수량']).fillna(1.0)
-                                line_combined = df_yield_combined_base.groupby('period')['개별수율'].prod().reset_index(name='종합수율(%)')
-                                line_combined['종합수율(%)'] *= 100
+                                line_combined, _ = composite_yield(df_resampled_pg_filtered, ['period'], cache_key=pg_yield_key + (tuple(selected_product_groups_pg),))
                                 
                                 df_to_plot_pg = pd.merge(bar_combined, line_combined, on='period', how='outer').fillna(0)
                                 df_to_plot_pg['신규분류요약'] = "선택항목 종합"
                             else:
-                                bar_data_pg = df_resampled_pg_filtered[df_resampled_pg_filtered['공정코드'] == '[80] 누수/규격검사'].groupby(['period', '신규분류요약'])['총_양품수량'].sum().reset_index().rename(columns={'총_양품수량': '완제품_제조개수'})
+                                bar_data_pg = df_resampled_pg_filtered[df_resampled_pg_filtered['공정코드'] == '[80] 누수/규격검사'].groupby(['period', '신규분류요약'], observed=True)['총_양품수량'].sum().reset_index().rename(columns={'총_양품수량': '완제품_제조개수'})
                                 
-                                with pd.option_context('mode.use_inf_as_na', True): df_resampled_pg_filtered['개별공정수율'] = (df_resampled_pg_filtered['총_양품수량'] / df_resampled_pg_filtered['총_생산수량']).fillna(1.0)
-                                line_data_pg = df_resampled_pg_filtered.groupby(['period', '신규분류요약'])['개별공정수율'].prod().reset_index(name='종합수율(%)')
-                                line_data_pg['종합수율(%)'] *= 100
+                                line_data_pg, _ = composite_yield(df_resampled_pg_filtered, ['period', '신규분류요약'], cache_key=pg_yield_key + (tuple(selected_product_groups_pg),))
                                 
                                 df_to_plot_pg = pd.merge(bar_data_pg, line_data_pg, on=['period', '신규분류요약'], how='outer').sort_values('period').fillna(0)
 
@@ -1,12 +1,928 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import pandas as pd
+import numpy as np
 import os
 import json
 import re
+import time
+import shutil
+import hashlib
+import queue
+import threading
 from datetime import datetime
 
 CONFIG_FILE = "analyzer_settings.json"
+BATCH_FILE = "analyzer_batch.json"
+
+# 엑셀 파싱 결과를 Arrow IPC 파일로 보관하는 캐시 (pyarrow 미설치 시 캐시 없이 동작)
+CACHE_DIR = ".analyzer_cache"
+CACHE_MAX_AGE_DAYS = 14
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+MIXED_COLUMNS_META = b"analyzer_mixed_columns"
+MIXED_TAG_SUFFIX = "::type"
+
+# 생산/불량 실적 파일은 분석에 쓰이는 컬럼만 스트리밍으로 읽음 (접두어 규칙은 중복된 '불량수량' 컬럼용)
+GROUP_OPTIONS = ['생산일자', '공장', '공정코드', '신규분류요약', '함수율', '품명', '기계코드', '사출기계코드', '공정기계코드', '불량명']
+QUANTITY_COLUMNS = ['양품수량', '불량수량', '샘플수량', '생산수량']
+STREAM_COLUMNS = {'prod': (GROUP_OPTIONS + ['생산실적번호'] + QUANTITY_COLUMNS, ()),
+                  'defect': (GROUP_OPTIONS + ['생산실적번호', '양품수량'], ('불량수량',))}
+STREAM_CHUNK_ROWS = 50000
+
+# 로딩 시 한 번만 만드는 정규 프레임: 날짜는 datetime64, 수량은 숫자, 차원 컬럼은 categorical
+CATEGORICAL_COLUMNS = ['공장', '공정코드', '기계코드', '품명', '신규분류요약', '불량명', '사출기계코드', '공정기계코드']
+DEFECT_QUANTITY_COLUMNS = ['불량수량(전체)', '불량수량(유형별)']
+
+# 생산 실적을 생산실적번호 기준으로 누적하는 로컬 SQLite 저장소 (매일 새 실적 파일만 추가, 생산일자 인덱스로 기간 조회)
+PRODUCTION_STORE = "production_store.sqlite"
+STORE_TABLE = "production"
+STORE_KEY_COLUMN = '생산실적번호'
+STORE_REPORT_NAME = "생산실적현황.xlsx"
+
+def _cache_entry_dir(file_path, variant=''):
+    # 경로(+읽기 방식)별 접두어와 크기/수정시각 지문으로 캐시 항목을 구분
+    stat = os.stat(file_path)
+    path_key = hashlib.sha1(f"{os.path.abspath(file_path)}|{variant}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{path_key}_{stat.st_size}_{stat.st_mtime_ns}")
+
+def file_fingerprint(file_path):
+    # 같은 경로라도 크기/수정시각이 바뀌면 다른 입력으로 봄 (파일이 없으면 None)
+    try: stat = os.stat(file_path)
+    except OSError: return None
+    return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+def _encode_mixed_column(s):
+    # 숫자/문자/날짜가 섞인 object 컬럼은 문자열 값 + 타입 태그로 나눠 손실 없이 저장
+    tag_map = {str: 0, int: 1, float: 2, type(None): 2, datetime: 3, pd.Timestamp: 3, bool: 4}
+    tags = s.map(lambda v: tag_map.get(type(v), 2 if isinstance(v, float) else 1 if isinstance(v, int) else 0)).astype('int8')
+    values = s.map(lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+    return values, tags
+
+def _decode_mixed_column(values, tags):
+    out, tags = values.to_numpy(dtype=object, copy=True), tags.to_numpy()
+    for tag, convert in ((1, lambda v: pd.to_numeric(v).astype('int64').astype(object)), (2, lambda v: pd.to_numeric(v, errors='coerce').astype(object)),
+                         (3, lambda v: pd.DatetimeIndex(v).to_pydatetime()), (4, lambda v: (v == 'True').astype(object))):
+        mask = tags == tag
+        if mask.any(): out[mask] = convert(pd.Series(out[mask]))
+    return pd.Series(out, index=values.index, name=values.name)
+
+def store_cached_sheet(entry_dir, sheet_index, df):
+    import pyarrow as pa
+    df = df.rename(columns=str)
+    mixed_cols = []
+    for col in df.columns[df.dtypes == object]:
+        try: pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col], df[f"{col}{MIXED_TAG_SUFFIX}"] = _encode_mixed_column(df[col]); mixed_cols.append(col)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), MIXED_COLUMNS_META: json.dumps(mixed_cols).encode('utf-8')})
+    os.makedirs(entry_dir, exist_ok=True)
+    with pa.OSFile(os.path.join(entry_dir, f"{sheet_index}.arrow"), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def commit_cached_workbook(entry_dir, sheet_names):
+    # manifest가 기록된 항목만 유효한 캐시로 취급 (시트 저장 도중 중단된 항목은 무시)
+    with open(os.path.join(entry_dir, 'manifest.json'), 'w', encoding='utf-8') as f: json.dump({'sheets': list(sheet_names)}, f, ensure_ascii=False)
+    prefix = os.path.basename(entry_dir).split('_')[0]
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix + '_') and name != os.path.basename(entry_dir): shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+    evict_workbook_cache()
+
+def load_cached_workbook(file_path, variant=''):
+    try:
+        import pyarrow as pa
+        entry_dir = _cache_entry_dir(file_path, variant)
+        with open(os.path.join(entry_dir, 'manifest.json'), 'r', encoding='utf-8') as f: sheet_names = json.load(f)['sheets']
+        df_dict = {}
+        for i, sheet_name in enumerate(sheet_names):
+            with pa.memory_map(os.path.join(entry_dir, f"{i}.arrow"), 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            mixed_cols = json.loads((table.schema.metadata or {}).get(MIXED_COLUMNS_META, b'[]'))
+            df = table.to_pandas()
+            for col in mixed_cols: df[col] = _decode_mixed_column(df[col], df.pop(f"{col}{MIXED_TAG_SUFFIX}"))
+            df_dict[sheet_name] = df
+        os.utime(os.path.join(entry_dir, 'manifest.json'))
+        return df_dict
+    except (ImportError, OSError, ValueError, KeyError):
+        return None
+
+def evict_workbook_cache(max_age_days=CACHE_MAX_AGE_DAYS, max_bytes=CACHE_MAX_BYTES):
+    if not os.path.isdir(CACHE_DIR): return
+    entries, now = [], time.time()
+    for name in os.listdir(CACHE_DIR):
+        entry_dir = os.path.join(CACHE_DIR, name); manifest = os.path.join(entry_dir, 'manifest.json')
+        try:
+            last_used = os.path.getmtime(manifest) if os.path.exists(manifest) else os.path.getmtime(entry_dir)
+            size = sum(e.stat().st_size for e in os.scandir(entry_dir) if e.is_file())
+        except OSError: continue
+        if now - last_used > max_age_days * 86400: shutil.rmtree(entry_dir, ignore_errors=True)
+        else: entries.append((last_used, size, entry_dir))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry_dir in sorted(entries):
+        if total <= max_bytes: break
+        shutil.rmtree(entry_dir, ignore_errors=True); total -= size
+
+def _stream_column_names(header):
+    # read_excel과 같은 규칙으로 빈 헤더/중복 헤더 이름을 만듦 ('Unnamed: n', '불량수량.1')
+    names, seen = [], set()
+    for i, h in enumerate(header):
+        name = f"Unnamed: {i}" if h is None else h
+        base, n = name, 0
+        while name in seen: n += 1; name = f"{base}.{n}"
+        seen.add(name); names.append(name)
+    return names
+
+def parse_production_dates(s):
+    # '2024.01.05', '2024-01-05', 날짜 셀('2024-01-05 00:00:00')이 섞여 있어도 모두 ISO8601로 해석
+    return pd.to_datetime(s.astype(str).str.replace('.', '-'), format='ISO8601', errors='coerce')
+
+def normalize_production_frame(df, file_type):
+    if file_type == 'defect':
+        found_defect_cols = [col for col in df.columns if str(col).startswith('불량수량')]
+        if len(found_defect_cols) >= 2: df = df.rename(columns={found_defect_cols[0]: '불량수량(전체)', found_defect_cols[1]: '불량수량(유형별)'})
+    if '생산일자' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['생산일자']):
+        df['생산일자'] = parse_production_dates(df['생산일자'])
+    for col in [c for c in QUANTITY_COLUMNS + DEFECT_QUANTITY_COLUMNS if c in df.columns]:
+        if not pd.api.types.is_numeric_dtype(df[col]): df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
+        df[col] = df[col].fillna(0)
+    for col in [c for c in CATEGORICAL_COLUMNS if c in df.columns]:
+        df[col] = df[col].astype('category')
+    return df
+
+def _convert_stream_chunk(chunk):
+    for col in chunk.columns:
+        if col == '생산일자':
+            chunk[col] = parse_production_dates(chunk[col])
+        elif col in QUANTITY_COLUMNS or str(col).startswith('불량수량'):
+            chunk[col] = pd.to_numeric(chunk[col].astype(str).str.replace(',', ''), errors='coerce')
+    return chunk
+
+def read_excel_projected(file_path, columns, prefixes=(), sheet_names=None):
+    keep = lambda name: name in columns or str(name).startswith(prefixes)
+    if not file_path.lower().endswith(('.xlsx', '.xlsm')):
+        return {sheet: _convert_stream_chunk(df[[c for c in df.columns if keep(c)]].copy()) for sheet, df in pd.read_excel(file_path, sheet_name=sheet_names).items()}
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    df_dict = {}
+    try:
+        for worksheet in workbook.worksheets:
+            if sheet_names is not None and worksheet.title not in sheet_names: continue
+            worksheet.reset_dimensions()
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None: df_dict[worksheet.title] = pd.DataFrame(); continue
+            names = _stream_column_names(header)
+            positions = [i for i, name in enumerate(names) if keep(name)]
+            selected = [names[i] for i in positions]
+            chunks, buffer = [], []
+            for row in rows:
+                if row.count(None) == len(row): continue
+                buffer.append([row[i] if i < len(row) else None for i in positions])
+                if len(buffer) >= STREAM_CHUNK_ROWS:
+                    chunks.append(_convert_stream_chunk(pd.DataFrame(buffer, columns=selected))); buffer = []
+            if buffer or not chunks: chunks.append(_convert_stream_chunk(pd.DataFrame(buffer, columns=selected)))
+            df_dict[worksheet.title] = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    finally:
+        workbook.close()
+    return df_dict
+
+def _workbook_variant(file_type):
+    columns, prefixes = STREAM_COLUMNS.get(file_type, (None, ()))
+    return f"stream:{','.join(columns)}|{','.join(prefixes)}" if columns else ''
+
+def workbook_sheet_names(file_path):
+    # 시트 목록은 xl/workbook.xml만 읽어서 확인 (공유 문자열/시트 본문은 열지 않음)
+    import zipfile
+    import xml.etree.ElementTree as ET
+    try:
+        with zipfile.ZipFile(file_path) as zf: root = ET.fromstring(zf.read('xl/workbook.xml'))
+        return [sheet.get('name') for sheet in root.iter('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheet')]
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError):
+        return None
+
+def parse_sheet_job(file_path, file_type, sheet_name, sheet_index):
+    # 프로세스 풀 작업 단위: 시트 하나를 읽고 캐시에 저장 (manifest 기록은 모든 시트가 끝난 뒤 GUI 쪽에서 수행)
+    columns, prefixes = STREAM_COLUMNS.get(file_type, (None, ()))
+    df = read_excel_projected(file_path, columns, prefixes, sheet_names=[sheet_name])[sheet_name] if columns else pd.read_excel(file_path, sheet_name=sheet_name)
+    try:
+        store_cached_sheet(_cache_entry_dir(file_path, _workbook_variant(file_type)), sheet_index, df); cached = True
+    except (ImportError, OSError, ValueError, TypeError):
+        cached = False
+    return df, cached
+
+def load_cached_workbook_job(file_path, file_type):
+    return load_cached_workbook(file_path, _workbook_variant(file_type))
+
+def read_excel_sheets(file_path, file_type=None):
+    columns, prefixes = STREAM_COLUMNS.get(file_type, (None, ()))
+    variant = _workbook_variant(file_type)
+    df_dict = load_cached_workbook(file_path, variant)
+    if df_dict is not None: return df_dict, True
+    df_dict = read_excel_projected(file_path, columns, prefixes) if columns else pd.read_excel(file_path, sheet_name=None)
+    entry_dir = _cache_entry_dir(file_path, variant)
+    try:
+        for i, df in enumerate(df_dict.values()): store_cached_sheet(entry_dir, i, df)
+        commit_cached_workbook(entry_dir, df_dict.keys())
+    except (ImportError, OSError, ValueError, TypeError):
+        shutil.rmtree(entry_dir, ignore_errors=True)
+    return df_dict, False
+
+def _quote_identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def ingest_production_file(file_path, store_path=PRODUCTION_STORE):
+    # 생산 실적 파일에서 저장소에 없는 생산실적번호 행만 추가하고 (추가 행 수, 건너뛴 행 수)를 반환
+    # 파일 읽기/정규화는 화면 로딩과 같은 경로(read_excel_sheets + normalize_production_frame)를 사용
+    import sqlite3
+    from contextlib import closing
+    df_dict, _ = read_excel_sheets(file_path, 'prod')
+    if not df_dict: raise ValueError("유효한 시트를 찾을 수 없습니다.")
+    df = normalize_production_frame(pd.concat(list(df_dict.values()), ignore_index=True), 'prod')
+    if STORE_KEY_COLUMN not in df.columns: raise KeyError(f"'{STORE_KEY_COLUMN}' 컬럼을 찾을 수 없습니다.")
+    total_rows = len(df)
+    df = df[df[STORE_KEY_COLUMN].notna()].astype(object)
+    df[STORE_KEY_COLUMN] = df[STORE_KEY_COLUMN].astype(str)
+    if '생산일자' in df.columns: df['생산일자'] = pd.to_datetime(df['생산일자']).dt.strftime('%Y-%m-%d')
+    df = df.astype(object).where(df.notna(), None)
+
+    with closing(sqlite3.connect(store_path)) as conn, conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {STORE_TABLE} ({_quote_identifier(STORE_KEY_COLUMN)} TEXT PRIMARY KEY, {_quote_identifier('생산일자')} TEXT)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {STORE_TABLE}_date ON {STORE_TABLE} ({_quote_identifier('생산일자')})")
+        existing_cols = {row[1] for row in conn.execute(f"PRAGMA table_info({STORE_TABLE})")}
+        for col in [c for c in df.columns if str(c) not in existing_cols]:
+            conn.execute(f"ALTER TABLE {STORE_TABLE} ADD COLUMN {_quote_identifier(col)}")
+        changes_before = conn.total_changes
+        conn.executemany(f"INSERT OR IGNORE INTO {STORE_TABLE} ({', '.join(_quote_identifier(c) for c in df.columns)}) VALUES ({', '.join('?' * len(df.columns))})",
+                         df.itertuples(index=False, name=None))
+        inserted = conn.total_changes - changes_before
+    return inserted, total_rows - inserted
+
+def read_production_store(store_path=PRODUCTION_STORE):
+    # 저장소 전체를 추가된 순서대로 읽어 화면 로딩과 같은 정규 프레임으로 반환
+    import sqlite3
+    from contextlib import closing
+    if not os.path.exists(store_path): raise FileNotFoundError(f"생산 실적 저장소 '{store_path}'가 없습니다. 먼저 --ingest로 실적을 추가해주세요.")
+    with closing(sqlite3.connect(store_path)) as conn:
+        df = pd.read_sql_query(f"SELECT * FROM {STORE_TABLE} ORDER BY rowid", conn)
+    return normalize_production_frame(df, 'prod')
+
+# 보고서 종류별 (설정 키, 결과 파일 접미어, 진행 문구, 성공 문구, 완료 문구)
+REPORT_SPECS = {
+    '수율 분석': ('yield_settings', '(수율)', "수율 보고서 생성 중...", "수율 보고서가 생성되었습니다.", "수율 보고서 생성 완료."),
+    '가동률 분석': ('util_settings', '(가동률)', "가동률 보고서 생성 중...", "가동률 보고서가 생성되었습니다.", "가동률 보고서 생성 완료."),
+    '목표 달성률 분석': ('target_settings', '(목표달성율)', "목표 달성률 보고서 생성 중...", "목표 달성률 보고서가 생성되었습니다.", "목표 달성률 보고서 생성 완료."),
+    '저가동 설비 분석': (None, '(저가동설비)', "저가동 설비 분석 중...", "저가동 설비 분석 보고서가 생성되었습니다.", "저가동 설비 분석 완료."),
+    '불량 원인 분석': ('defect_settings', '(최적화)', "불량 원인 분석 보고서 생성 중...", "최적화된 불량 분석 보고서가 생성되었습니다.", "불량 원인 분석 완료."),
+}
+INPUT_FILE_KEYWORDS = {"생산실적현황": 'prod', "가동율참고": 'capa', "생산목표량": 'target', "설비리스트및저가동설비기준": 'criteria', "불량실적현황": 'defect'}
+TIME_UNITS = ['일별', '주간별', '월별', '연도별']
+DEFAULT_REPORT_SETTINGS = {'yield_settings': {}, 'util_settings': {'기계코드': True}, 'target_settings': {'공장': True, '공정코드': True},
+                           'defect_settings': {'공장': True, '사출기계코드': True, '공정기계코드': True, '불량명': True}}
+# 보고서 생성 단계별 진행률(%) (GUI 진행 표시줄)
+REPORT_STAGES = {'데이터 준비': 5, '기간 필터링': 20, '집계': 45, '병합': 65, '저장': 85}
+HISTORY_COLUMN = '과거 생산 품목 상세 이력'
+MACHINE_KEYS = ['공장', '공정코드', '기계코드']
+EXCEL_MAX_DATA_ROWS = 1048576 - 1  # 시트당 최대 행 수에서 헤더 1행 제외
+WIDTH_SAMPLE_ROWS = 20000
+
+class ReportError(Exception):
+    # 입력 누락/빈 결과처럼 보고서를 만들 수 없는 상황 (GUI는 level에 맞는 메시지 박스로, 배치는 로그로 표시)
+    def __init__(self, message, level='warning', title=None):
+        super().__init__(message)
+        self.level, self.title = level, title or {'warning': "경고", 'info': "정보", 'error': "오류"}[level]
+
+class ReportCancelled(ReportError):
+    # 진행 중인 보고서 생성을 사용자가 취소함 (다음 단계로 넘어가는 시점에 발생)
+    def __init__(self):
+        super().__init__("보고서 생성을 취소했습니다.", 'info')
+
+def find_input_files():
+    # 현재 폴더에서 키워드별 첫 번째 입력 파일을 찾음 (보고서 결과 파일은 제외)
+    output_suffixes = [spec[1] for spec in REPORT_SPECS.values()]
+    file_names, found_files = os.listdir('.'), []
+    for keyword, file_type in INPUT_FILE_KEYWORDS.items():
+        found_file = next((f for f in file_names if keyword in f and f.endswith('.xlsx') and not any(suffix in f for suffix in output_suffixes)), None)
+        if found_file: found_files.append((found_file, file_type))
+    return found_files
+
+def load_report_settings():
+    # 저장된 설정이 없으면 모드별 기본 집계 기준을 사용 (두 번째 값은 설정 파일을 읽었는지 여부)
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f: settings = json.load(f)
+        return {key: settings.get(key, {}) for key in DEFAULT_REPORT_SETTINGS}, True
+    except FileNotFoundError:
+        return {key: dict(value) for key, value in DEFAULT_REPORT_SETTINGS.items()}, False
+
+def load_batch_jobs(batch_path=BATCH_FILE, start='', end=''):
+    # 배치 정의 파일({"jobs": [{"mode", "group_by", "time_unit", "start", "end", "name"}, ...]})을 읽어 작업 목록으로 정리.
+    # 기간을 적지 않은 작업은 start/end를 쓰고, 이름이 없으면 시간 단위와 집계 기준으로 만듦 (결과 파일명 뒤에 붙음)
+    with open(batch_path, 'r', encoding='utf-8') as f: definition = json.load(f)
+    jobs, names = [], set()
+    for i, job in enumerate(definition['jobs'] if isinstance(definition, dict) else definition, 1):
+        mode, time_unit, group_by = job.get('mode'), job.get('time_unit', '일별'), list(job.get('group_by', []))
+        if mode not in REPORT_SPECS: raise ValueError(f"{i}번째 작업의 분석 모드 '{mode}'를 알 수 없습니다. ({', '.join(REPORT_SPECS)})")
+        if time_unit not in TIME_UNITS: raise ValueError(f"{i}번째 작업의 시간 단위 '{time_unit}'를 알 수 없습니다. ({', '.join(TIME_UNITS)})")
+        job_start, job_end = job.get('start', start), job.get('end', end)
+        name = job.get('name') or '_'.join(part for part in [time_unit, '+'.join(group_by), f"{job_start}~{job_end}" if job_start or job_end else ''] if part)
+        name = re.sub(r'[\\/:*?"<>|]', '_', name)
+        if (mode, name) in names: name = f"{name}_{i}"
+        names.add((mode, name))
+        jobs.append({'name': name, 'mode': mode, 'group_by': group_by, 'time_unit': time_unit, 'start': job_start, 'end': job_end})
+    return jobs
+
+def _estimate_column_widths(df, padding):
+    # 열 너비는 문자열 길이의 최댓값으로 정하되, 큰 보고서는 표본 행만 사용
+    sample = df if len(df) <= WIDTH_SAMPLE_ROWS else df.sample(WIDTH_SAMPLE_ROWS, random_state=0)
+    widths = []
+    for i, column_name in enumerate(df.columns):
+        if column_name == HISTORY_COLUMN: widths.append(99); continue
+        try:
+            max_length = sample.iloc[:, i].astype(str).str.len().max()
+            widths.append(max(0 if pd.isna(max_length) else max_length, len(str(column_name))) + padding)
+        except (ValueError, TypeError):
+            widths.append(len(str(column_name)) + padding)
+    return widths
+
+def _sheet_parts(sheet_name, df):
+    # 엑셀 행 제한을 넘는 보고서는 '시트명', '시트명_2', '시트명_3' ... 으로 나눔
+    if len(df) <= EXCEL_MAX_DATA_ROWS:
+        yield sheet_name, df; return
+    for part, start in enumerate(range(0, len(df), EXCEL_MAX_DATA_ROWS), 1):
+        suffix = '' if part == 1 else f"_{part}"
+        yield f"{sheet_name[:31 - len(suffix)]}{suffix}", df.iloc[start:start + EXCEL_MAX_DATA_ROWS]
+
+def _excel_rows(df):
+    # 행 단위 값 목록 (NaN/NaT는 빈 칸), 큰 프레임은 조각별로 변환해 메모리 사용을 제한
+    for start in range(0, len(df), STREAM_CHUNK_ROWS):
+        chunk = df.iloc[start:start + STREAM_CHUNK_ROWS].astype(object)
+        yield from chunk.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+def save_sheets_excel_autofit(sheets_data, file_path, padding=2):
+    # 행 순서대로 흘려 쓰는 저장 (xlsxwriter constant_memory, 미설치 시 openpyxl write_only).
+    # 서식은 셀마다 주지 않고 열 단위로 지정
+    try:
+        import xlsxwriter
+    except ImportError:
+        return _save_sheets_write_only(sheets_data, file_path, padding)
+
+    workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+                                               'strings_to_formulas': False, 'strings_to_urls': False})
+    try:
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        wrap_format = workbook.add_format({'text_wrap': True, 'valign': 'top'})
+        for sheet_name, df in sheets_data.items():
+            widths = _estimate_column_widths(df, padding)
+            for part_name, part_df in _sheet_parts(sheet_name, df):
+                worksheet = workbook.add_worksheet(part_name)
+                for i, (column_name, width) in enumerate(zip(df.columns, widths)):
+                    worksheet.set_column(i, i, width, wrap_format if column_name == HISTORY_COLUMN else None)
+                worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+                for row_index, row in enumerate(_excel_rows(part_df), 1):
+                    worksheet.write_row(row_index, 0, row)
+    finally:
+        workbook.close()
+
+def _save_sheets_write_only(sheets_data, file_path, padding):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    header_font, wrap_alignment = Font(bold=True), Alignment(wrap_text=True, vertical='top')
+    for sheet_name, df in sheets_data.items():
+        widths = _estimate_column_widths(df, padding)
+        history_index = list(df.columns).index(HISTORY_COLUMN) if HISTORY_COLUMN in df.columns else None
+        for part_name, part_df in _sheet_parts(sheet_name, df):
+            worksheet = workbook.create_sheet(part_name)
+            for i, width in enumerate(widths, 1): worksheet.column_dimensions[get_column_letter(i)].width = width
+            header = [WriteOnlyCell(worksheet, value=str(c)) for c in df.columns]
+            for cell in header: cell.font = header_font
+            worksheet.append(header)
+            for row in _excel_rows(part_df):
+                if history_index is not None:
+                    # write-only 모드는 열 서식이 이미 쓴 셀에 적용되지 않으므로 이력 컬럼만 셀에 줄바꿈 지정
+                    row = list(row); row[history_index] = WriteOnlyCell(worksheet, value=row[history_index]); row[history_index].alignment = wrap_alignment
+                worksheet.append(row)
+    workbook.save(file_path)
+
+def _labels_by_date(dates, make_labels, missing):
+    # 날짜 값마다 한 번만 라벨을 만들고 factorize 코드로 행에 펼침 (날짜가 없는 행(코드 -1)은 missing)
+    codes, uniques = pd.factorize(dates)
+    labels = [np.append(np.asarray(values, dtype=object), missing) for values in make_labels(pd.DatetimeIndex(uniques))]
+    return [values[codes] for values in labels]
+
+def _week_labels(dates):
+    # 월요일~일요일 주 (Period 'W'와 같은 경계): ('시작일 ~ 종료일', 'N월 M주차')
+    week_start = dates.normalize() - pd.to_timedelta(dates.weekday, unit='D')
+    week_end = week_start + pd.Timedelta(days=6)
+    period = week_start.strftime('%Y-%m-%d') + ' ~ ' + week_end.strftime('%Y-%m-%d')
+    week_label = week_start.month.astype(str) + '월 ' + ((week_start.day - 1) // 7 + 1).astype(str) + '주차'
+    return period, week_label
+
+def date_window(df, start='', end='', keep_undated=False):
+    # '생산일자' 순으로 정렬된(날짜 없는 행은 맨 뒤) 프레임에서 [start, end] 구간을 이진 탐색으로 찾아 iloc 위치 슬라이스로 반환.
+    # 기간을 하나도 주지 않았고 keep_undated=True면 날짜 없는 행까지 그대로 반환
+    start_date, end_date = start.replace('.', '-'), end.replace('.', '-')
+    if keep_undated and not start_date and not end_date: return df
+    dates = df['생산일자']
+    lo = dates.searchsorted(pd.to_datetime(start_date), side='left') if start_date else 0
+    hi = dates.searchsorted(pd.to_datetime(end_date), side='right') if end_date else dates.searchsorted(pd.NaT)
+    return df.iloc[lo:hi]
+
+def aggregate_cube_shard(df, dims, measures):
+    # 공장(/월) 조각 하나의 일별 큐브 (프로세스 풀 작업). '_첫행'은 그룹이 원본 실적에 처음 나온 위치로, 조각을 합친 뒤 행 순서를 복원할 때 씀
+    agg_spec = {col: (col, 'sum') for col in measures}
+    agg_spec['_첫행'] = ('_첫행', 'min')
+    return df.groupby(dims, dropna=False, observed=True, sort=False).agg(**agg_spec).reset_index()
+
+def aggregate_defect_shard(df, first_run_rows, prod_group_cols, detail_group_cols):
+    # 불량 실적(또는 그 공장/월 조각)의 생산 수량 합계(생산실적번호별 첫 행 기준)와 불량 유형별 합계
+    prod_runs_df = df.loc[first_run_rows, prod_group_cols + ['양품수량', '불량수량(전체)']]
+    if prod_group_cols:
+        prod_agg_df = prod_runs_df.groupby(prod_group_cols, observed=True).agg(
+            양품수량=('양품수량', 'sum'),
+            불량수량_전체_집계=('불량수량(전체)', 'sum')
+        ).reset_index()
+    else: # 사용자가 '불량명'만 선택하는 등, 생산량을 묶을 기준이 없는 경우
+        prod_agg_df = pd.DataFrame([{
+            '양품수량': prod_runs_df['양품수량'].sum(),
+            '불량수량_전체_집계': prod_runs_df['불량수량(전체)'].sum()
+        }])
+    defect_agg_df = df.groupby(detail_group_cols, observed=True).agg(
+        불량수량_유형별_집계=('불량수량(유형별)', 'sum')
+    ).reset_index()
+    return prod_agg_df, defect_agg_df
+
+def period_labels(dates, time_unit):
+    # '생산일자' 시리즈로 만든 시간 단위 라벨 컬럼 {'기간': ..., (주간별은) '주차': ...} (주간별은 날짜가 없는 행의 라벨을 비워 집계에서 뺌).
+    # 라벨 문자열은 서로 다른 날짜 수만큼만 만듦
+    if time_unit == '일별':
+        period, = _labels_by_date(dates, lambda d: [d.strftime('%Y-%m-%d')], np.nan)
+        return {'기간': period}
+    if time_unit == '주간별':
+        period, week_label = _labels_by_date(dates, _week_labels, None)
+        return {'기간': period, '주차': week_label}
+    if time_unit == '월별':
+        period, = _labels_by_date(dates, lambda d: [d.to_period('M').astype(str)], 'NaT')
+        return {'기간': period}
+    if time_unit == '연도별':
+        return {'기간': dates.dt.year}
+    return {}
+
+def period_group_columns(group_by_cols, time_unit):
+    # '생산일자' 선택 시 시간 단위 라벨 컬럼을 맨 앞에 두고 '생산일자'는 집계 기준에서 뺌
+    if '생산일자' not in group_by_cols: return list(group_by_cols)
+    period_cols = ['기간', '주차'] if time_unit == '주간별' else ['기간'] if time_unit in TIME_UNITS else []
+    return period_cols + [col for col in group_by_cols if col != '생산일자']
+
+class ProductionReportEngine:
+    # GUI 없이 입력 데이터를 보관하고 보고서를 만드는 엔진. 기간 필터/시간 단위 라벨을 붙인 생산 실적은
+    # 요청 조건별로 한 번만 만들어 보고서끼리 공유함 (공유 프레임은 수정하지 않고 새 입력이 들어오면 비움)
+    def __init__(self, shard_workers=0, shard_by_month=False):
+        self.production_df, self.capacity_df, self.criteria_df, self.defect_df = None, None, None, None
+        self.target_table = None
+        self.available_target_dates = []
+        self.prod_file_path = ""
+        self.prod_fingerprint = None
+        self._shared = {}
+        self._history_cache = {}
+        self.progress = None  # 단계 이름을 받는 콜백 (취소하려면 ReportCancelled를 발생)
+        # 2 이상이면 큐브/불량 집계를 공장(shard_by_month면 공장 × 월) 조각으로 나눠 프로세스 풀에서 계산한 뒤 합침
+        self.shard_workers, self.shard_by_month = shard_workers, shard_by_month
+
+    def store_sheets(self, file_path, file_type, df_dict, from_cache=False):
+        success_text = {'prod': "생산 실적 로딩 완료", 'capa': "최대 생산량 로딩 완료", 'target': "월별 생산 목표 로딩 완료", 'criteria': "저가동 기준 로딩 완료", 'defect': "불량 실적 로딩 완료"}.get(file_type)
+        if file_type == 'prod': self.prod_file_path, self.prod_fingerprint = file_path, file_fingerprint(file_path)
+
+        if file_type == 'target':
+            self.target_table, self.available_target_dates = None, []
+            all_sheets_df = pd.concat(df_dict.values(), ignore_index=True)
+
+            required_cols = ['년', '월', '공장', '공정코드', '일일_생산목표량']
+            if not all(col in all_sheets_df.columns for col in required_cols):
+                raise ValueError(f"생산 목표 파일에는 {', '.join(required_cols)} 컬럼이 모두 필요합니다.")
+
+            all_sheets_df.dropna(subset=required_cols, inplace=True)
+            all_sheets_df['년'] = pd.to_numeric(all_sheets_df['년'], errors='coerce').astype('Int64')
+            all_sheets_df['월'] = pd.to_numeric(all_sheets_df['월'], errors='coerce').astype('Int64')
+            all_sheets_df.dropna(subset=['년', '월'], inplace=True)
+
+            # (공장, 공정코드, 목표년월=yyyymm)으로 색인한 하나의 목표 표
+            all_sheets_df['목표년월'] = (all_sheets_df['년'] * 100 + all_sheets_df['월']).astype('int64')
+            self.target_table = all_sheets_df.drop(columns=['년', '월']).set_index(['공장', '공정코드', '목표년월']).sort_index(level='목표년월', sort_remaining=False, kind='stable')
+            self.available_target_dates = [(month // 100, month % 100) for month in self.target_table.index.unique(level='목표년월').sort_values()]
+
+            if self.available_target_dates:
+                min_date = f"{self.available_target_dates[0][0]}년 {self.available_target_dates[0][1]}월"
+                max_date = f"{self.available_target_dates[-1][0]}년 {self.available_target_dates[-1][1]}월"
+                success_text = f"월별 목표 로딩 완료: {min_date} ~ {max_date}"
+            else:
+                success_text = "월별 목표 데이터 없음"
+
+        elif file_type == 'criteria':
+            df = pd.concat(df_dict.values(), ignore_index=True)
+            criteria_col_name = '저가동설비기준'
+            if criteria_col_name not in df.columns: raise KeyError(f"'{criteria_col_name}' 컬럼을 찾을 수 없습니다. 엑셀 파일의 D열 첫 행에 컬럼명이 올바르게 입력되었는지 확인해주세요.")
+            s = df[criteria_col_name]
+            if pd.api.types.is_numeric_dtype(s) and (s.dropna() <= 1).all() and (s.dropna() > 0).any(): df[criteria_col_name] = s * 100
+            else: df[criteria_col_name] = pd.to_numeric(s.astype(str).str.replace('%', '', regex=False), errors='coerce')
+            df.dropna(subset=[criteria_col_name], inplace=True)
+            self.criteria_df = df
+        else:
+            df_attribute = {'prod': 'production_df', 'capa': 'capacity_df', 'defect': 'defect_df'}.get(file_type)
+            if not df_dict: raise ValueError("유효한 시트를 찾을 수 없습니다.")
+            df = pd.concat(list(df_dict.values()), ignore_index=True)
+            if file_type in ('prod', 'defect'): df = normalize_production_frame(df, file_type)
+            if file_type == 'defect': df = df.sort_values('생산일자', kind='stable', na_position='last', ignore_index=True)
+            setattr(self, df_attribute, df)
+
+        self._shared.clear()
+        return success_text + " (캐시)" if from_cache else success_text
+
+    def discard(self, file_type):
+        if file_type == 'criteria': self.criteria_df = None
+        if file_type == 'defect': self.defect_df = None
+
+    def load_inputs(self, found_files=None):
+        # 배치 실행용: 입력 파일을 프로세스 풀에서 동시에 읽어 보관하고 파일별 (경로, 종류, 완료 문구 또는 예외)를 반환
+        found_files = find_input_files() if found_files is None else found_files
+        if not found_files: return []
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=max(1, min(len(found_files), os.cpu_count() or 1)))
+        except (OSError, RuntimeError, ImportError):
+            executor = None
+        results = []
+        try:
+            futures = [executor.submit(read_excel_sheets, file_path, file_type) for file_path, file_type in found_files] if executor else [None] * len(found_files)
+            for (file_path, file_type), future in zip(found_files, futures):
+                try:
+                    df_dict, from_cache = future.result() if future else read_excel_sheets(file_path, file_type)
+                    results.append((file_path, file_type, self.store_sheets(file_path, file_type, df_dict, from_cache)))
+                except Exception as e:
+                    self.discard(file_type); results.append((file_path, file_type, e))
+        finally:
+            if executor: executor.shutdown()
+        return results
+
+    def load_production_store(self, store_path=PRODUCTION_STORE):
+        self.production_df, self.prod_file_path, self.prod_fingerprint = read_production_store(store_path), STORE_REPORT_NAME, file_fingerprint(store_path)
+        self._shared.clear()
+        return f"생산 실적 저장소 로딩 완료 ({len(self.production_df):,}행)"
+
+    def output_path(self, mode):
+        if mode == '불량 원인 분석': return "불량실적현황(최적화).xlsx"
+        return f"{os.path.splitext(self.prod_file_path)[0]}{REPORT_SPECS[mode][1]}.xlsx"
+
+    def build(self, mode, group_by=(), time_unit='일별', start='', end='', grouping_sets=None):
+        # 보고서 데이터프레임만 만듦 (만들 수 없으면 ReportError). 불량 원인 분석에 grouping_sets를 주면 조합별 {시트명: 데이터프레임}
+        self._progress('데이터 준비')
+        if grouping_sets and mode == '불량 원인 분석': return self.build_defect_grouping_sets(grouping_sets, start, end)
+        builder = {'수율 분석': self.build_yield_report, '가동률 분석': self.build_utilization_report, '목표 달성률 분석': self.build_target_report,
+                   '저가동 설비 분석': self.build_low_utilization_report, '불량 원인 분석': self.build_defect_report}[mode]
+        return builder(list(group_by), time_unit, start, end)
+
+    def save(self, mode, report_df, save_path=None):
+        self._progress('저장')
+        save_path = save_path or self.output_path(mode)
+        if mode == '불량 원인 분석': save_sheets_excel_autofit(report_df if isinstance(report_df, dict) else {"설비별_상세분석": report_df}, save_path, padding=4)
+        else: save_sheets_excel_autofit({'Summary': report_df}, save_path)
+        return save_path
+
+    def generate(self, mode, group_by=(), time_unit='일별', start='', end='', grouping_sets=None):
+        # 보고서를 만들어 저장하고 저장 경로를 반환
+        return self.save(mode, self.build(mode, group_by, time_unit, start, end, grouping_sets))
+
+    def run_batch(self, settings, start='', end='', time_unit='일별'):
+        # 다섯 보고서를 저장된 모드별 집계 기준으로 한 번에 생성 (보고서별 (모드, 저장 경로 또는 None, 예외 또는 None))
+        results = []
+        for mode, (settings_key, *_) in REPORT_SPECS.items():
+            mode_settings = settings.get(settings_key, {}) if settings_key else {}
+            group_by = [col for col in GROUP_OPTIONS if mode_settings.get(col)]
+            grouping_sets = mode_settings.get('grouping_sets') if mode_settings.get('use_grouping_sets') else None
+            try: results.append((mode, self.generate(mode, group_by, time_unit, start, end, grouping_sets), None))
+            except Exception as e: results.append((mode, None, e))
+        return results
+
+    def run_jobs(self, jobs, max_workers=None):
+        # 배치 정의의 작업들을 같은 준비 데이터(큐브/기간 필터/시간 단위 라벨/불량 기반) 위에서 스레드 풀로 동시에 실행하고
+        # 작업마다 '<보고서 파일명>_<작업 이름>.xlsx'로 저장. 작업별 ('모드/이름', 저장 경로 또는 None, 예외 또는 None)을 정의 순서대로 반환
+        if not jobs: return []
+        for job in jobs:
+            # 공유 프레임은 스레드가 동시에 만들지 않도록 먼저 준비 (입력이 없어 못 만들면 해당 작업에서 오류로 보고됨)
+            try:
+                if job['mode'] == '불량 원인 분석':
+                    if self.defect_df is not None: self._defect_frames(job['start'], job['end'])
+                    continue
+                self._daily_cube()
+                if '생산일자' in job['group_by']: self._period_labels(job['start'], job['end'], job['time_unit'])
+                if job['mode'] == '저가동 설비 분석': self.production_history()
+            except Exception:
+                pass
+
+        def run_job(job):
+            label = f"{job['mode']}/{job['name']}"
+            try:
+                report_df = self.build(job['mode'], job['group_by'], job['time_unit'], job['start'], job['end'])
+                return label, self.save(job['mode'], report_df, f"{os.path.splitext(self.output_path(job['mode']))[0]}_{job['name']}.xlsx"), None
+            except Exception as e:
+                return label, None, e
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_workers or max(1, min(len(jobs), os.cpu_count() or 1))) as executor:
+            return list(executor.map(run_job, jobs))
+
+    def _progress(self, stage):
+        if self.progress: self.progress(stage)
+
+    def _shards(self, df):
+        # 공장(/월)별 행 위치 목록 (오름차순). 샤딩을 쓰지 않거나 조각이 하나뿐이면 None.
+        # 빈 공장/날짜도 하나의 조각 코드로 남겨(use_na_sentinel=False) 어느 조각에서도 행이 빠지지 않게 함
+        if (self.shard_workers or 0) < 2 or '공장' not in df.columns: return None
+        codes, _ = pd.factorize(df['공장'], use_na_sentinel=False)
+        if self.shard_by_month and '생산일자' in df.columns:
+            month_codes, months = pd.factorize(df['생산일자'].dt.year * 100 + df['생산일자'].dt.month, use_na_sentinel=False)
+            codes = codes * len(months) + month_codes
+        order = np.argsort(codes, kind='stable')
+        shards = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1) if len(order) else []
+        assert sum(len(rows) for rows in shards) == len(df), "샤드 행 수가 원본 행 수와 다릅니다."
+        return shards if len(shards) > 1 else None
+
+    def _map_shards(self, func, shard_args):
+        # 조각별 작업을 프로세스 풀에서 실행 (풀을 만들 수 없는 환경이면 순서대로 실행)
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=max(1, min(self.shard_workers, len(shard_args))))
+        except (OSError, RuntimeError, ImportError):
+            return [func(*args) for args in shard_args]
+        with executor:
+            return list(executor.map(func, *zip(*shard_args)))
+
+    def _daily_cube(self):
+        # 수율/가동률/목표/저가동 보고서가 쓰는 가장 작은 단위(생산일자 × 모든 차원)로 수량을 미리 합산한 큐브.
+        # 입력이 바뀔 때까지 재사용하고, 보고서는 원본 행 대신 이 큐브에서 다시 묶음 (빈 차원 값도 행으로 유지).
+        # 생산일자 순으로 정렬해 두어 기간 필터는 date_window의 이진 탐색 슬라이스로 처리 (인덱스는 실적 파일에 처음 나온 순서)
+        if 'cube' not in self._shared:
+            if self.production_df is None: raise ReportError("생산 실적 파일을 선택해주세요.")
+            df = self.production_df
+            dims = [col for col in GROUP_OPTIONS if col in df.columns]
+            measures = [col for col in QUANTITY_COLUMNS if col in df.columns]
+            shards = self._shards(df)
+            if shards is None:
+                cube = df.groupby(dims, dropna=False, observed=True, sort=False)[measures].sum().reset_index()
+            else:
+                # 공장은 큐브 차원이므로 조각별 큐브는 서로 겹치지 않음: 이어 붙이고 처음 나온 위치 순으로 되돌리면 한 번에 만든 큐브와 같음
+                parts = self._map_shards(aggregate_cube_shard, [(df.iloc[rows][dims + measures].assign(_첫행=rows), dims, measures) for rows in shards])
+                cube = pd.concat(parts, ignore_index=True).sort_values('_첫행', ignore_index=True).drop(columns='_첫행')
+            self._shared['cube'] = cube.sort_values('생산일자', kind='stable', na_position='last')
+        return self._shared['cube']
+
+    def _production_frame(self, start='', end=''):
+        # 기간을 거른 큐브 (복사 없는 위치 슬라이스이므로 읽기만 함)
+        return date_window(self._daily_cube(), start, end, keep_undated=True)
+
+    def _period_labels(self, start, end, time_unit):
+        # 기간별 시간 단위 라벨 컬럼만 따로 만들어 보고서끼리 공유 (_production_frame과 같은 행 순서)
+        key = ('labels', start, end, time_unit)
+        if key not in self._shared: self._shared[key] = period_labels(self._production_frame(start, end)['생산일자'], time_unit)
+        return self._shared[key]
+
+    def _grouped_production_frame(self, group_by, time_unit, start, end, columns=(), project=False):
+        # 보고서가 읽을 프레임과 집계 기준 컬럼 목록. 공유 큐브는 수정하지 않음: 시간 단위 라벨을 붙이거나 병합할 때(project=True)만
+        # 집계 기준 + columns 컬럼만 뽑은 가벼운 프레임을 만들고, 그 외에는 큐브 슬라이스를 그대로 넘김
+        self._progress('기간 필터링')
+        base_df = self._production_frame(start, end)
+        if not group_by: raise ReportError("집계 기준을 선택해주세요.")
+        group_by_columns = period_group_columns(group_by, time_unit)
+        if '생산일자' not in group_by and not project: return base_df, group_by_columns
+        report_df = base_df[list(dict.fromkeys([col for col in group_by_columns if col in base_df.columns] + list(columns)))]
+        if '생산일자' in group_by: report_df = report_df.assign(**self._period_labels(start, end, time_unit))
+        return report_df, group_by_columns
+
+    def build_yield_report(self, group_by, time_unit='일별', start='', end=''):
+        base_df, group_by_columns = self._grouped_production_frame(group_by, time_unit, start, end, ['생산수량', '양품수량', '불량수량'])
+        self._progress('집계')
+        summary = base_df.groupby(group_by_columns, observed=True).agg(총_생산수량=('생산수량', 'sum'), 총_양품수량=('양품수량', 'sum'), 총_불량수량=('불량수량', 'sum')).reset_index()
+        summary['전체_수율(%)'] = round((summary['총_양품수량'] / summary['총_생산수량'].where(summary['총_생산수량'] != 0)) * 100, 2).fillna(0)
+        return summary
+
+    def build_utilization_report(self, group_by, time_unit='일별', start='', end=''):
+        if self.capacity_df is None: raise ReportError("'최대 생산량 파일'을 선택해야 합니다.")
+        base_df, group_by_columns = self._grouped_production_frame(group_by, time_unit, start, end, MACHINE_KEYS + ['생산수량', '양품수량', '생산일자'], project=True)
+        self._progress('병합')
+        base_df = base_df.sort_index()  # '일일_최대생산량'(first)은 실적 파일 순서 기준
+        merged_df = pd.merge(base_df, self.capacity_df, on=['공장', '공정코드', '기계코드'], how='left'); merged_df['이론상 최대 생산량'] = merged_df['이론상 최대 생산량'].fillna(0)
+        self._progress('집계')
+        agg_dict = {'총_생산수량': ('생산수량', 'sum'), '총_양품수량': ('양품수량', 'sum'), '일일_최대생산량': ('이론상 최대 생산량', 'first'), '운영일수': ('생산일자', 'nunique')}
+        summary = merged_df.groupby(group_by_columns, observed=True).agg(**agg_dict).reset_index()
+        if time_unit == '주간별': summary['운영일수'] = 7
+        summary['이론상_총_생산량'] = summary['일일_최대생산량'] * summary['운영일수']
+        summary['전체_수율(%)'] = round((summary['총_양품수량'] / summary['총_생산수량'].where(summary['총_생산수량'] != 0)) * 100, 2).fillna(0)
+        summary['가동률(%)'] = round((summary['총_생산수량'] / summary['이론상_총_생산량'].where(summary['이론상_총_생산량'] != 0)) * 100, 2).fillna(0)
+        final_cols = group_by_columns + ['총_생산수량', '총_양품수량', '전체_수율(%)', '운영일수', '이론상_총_생산량', '가동률(%)']
+        return summary[[col for col in final_cols if col in summary.columns]]
+
+    def _resolve_target_months(self, prod_months):
+        # 생산 년월(yyyymm)마다 쓸 목표 년월: 같은 달 → 가장 가까운 과거 달 → (과거가 없으면) 가장 이른 미래 달. 모든 달을 한 번에 as-of로 찾음
+        target_months = np.array([year * 100 + month for year, month in self.available_target_dates], dtype='int64')
+        return target_months[np.maximum(np.searchsorted(target_months, prod_months, side='right') - 1, 0)]
+
+    def build_target_report(self, group_by, time_unit='일별', start='', end=''):
+        if self.target_table is None or self.target_table.empty: raise ReportError("'월별 생산 목표 파일'을 선택해야 합니다.")
+        base_df, group_by_columns = self._grouped_production_frame(group_by, time_unit, start, end, ['공장', '공정코드', '생산수량', '양품수량', '생산일자'], project=True)
+        base_df = date_window(base_df).sort_index()  # 같은 달 안에서는 실적 파일 순서 기준으로 '일일_목표량'(first)을 고름
+        if base_df.empty: raise ReportError("선택된 기간에 해당하는 생산 목표 데이터가 없습니다.", 'info')
+
+        # 생산 년월 순으로 정렬해 두고(같은 그룹의 '일일_목표량'은 가장 이른 달 기준) 목표 표와 한 번만 조인
+        prod_months = (base_df['생산일자'].dt.year * 100 + base_df['생산일자'].dt.month).to_numpy()
+        month_order = np.argsort(prod_months, kind='stable')
+        base_df = base_df.iloc[month_order].assign(목표년월=self._resolve_target_months(prod_months[month_order]))
+        self._progress('병합')
+        merged_df = pd.merge(base_df, self.target_table, left_on=['공장', '공정코드', '목표년월'], right_index=True, how='left')
+        merged_df.dropna(subset=['일일_생산목표량'], inplace=True)
+        merged_df = merged_df[merged_df['일일_생산목표량'] > 0]
+
+        if merged_df.empty: raise ReportError("유효한 생산 목표가 설정된 공정이 없습니다.", 'info')
+        self._progress('집계')
+
+        agg_dict = {
+            '총_생산수량': ('생산수량', 'sum'),
+            '총_양품수량': ('양품수량', 'sum'),
+            '일일_목표량': ('일일_생산목표량', 'first'),
+            '운영일수': ('생산일자', 'nunique')
+        }
+        summary = merged_df.groupby(group_by_columns, observed=True).agg(**agg_dict).reset_index()
+
+        if time_unit == '주간별': summary['운영일수'] = 7
+        summary['목표_총_생산량'] = summary['일일_목표량'] * summary['운영일수']
+
+        summary['양품수_기준_달성률(%)'] = round((summary['총_양품수량'] / summary['목표_총_생산량'].where(summary['목표_총_생산량'] != 0)) * 100, 2).fillna(0)
+
+        final_cols_order = group_by_columns + [
+            '총_양품수량', '총_생산수량', '목표_총_생산량', '양품수_기준_달성률(%)',
+            '일일_목표량', '운영일수'
+        ]
+        return summary[[col for col in final_cols_order if col in summary.columns]]
+
+    def machine_period_utilization(self, start='', end='', return_daily=False):
+        # 저가동 기준 설비별 기간 평균 가동률 = Σ(생산일의 생산수량 / 이론상 최대 생산량 × 100) / 기간 일수.
+        # 생산이 없는 날은 0%이므로 설비 × 날짜 전체 격자를 만들지 않고 생산일만 더함 (최대 생산량 행이 여러 개인 설비는 행별 평균).
+        # return_daily=True면 생산일만 담은 (설비, 생산일자) 희소(COO 형태) 일별 가동률 프레임도 함께 반환
+        self._progress('기간 필터링')
+        prod_df = date_window(self._daily_cube())
+
+        start_date_str = start.replace('.', '-')
+        end_date_str = end.replace('.', '-')
+        start_date = pd.to_datetime(start_date_str) if start_date_str else prod_df['생산일자'].min()
+        end_date = pd.to_datetime(end_date_str) if end_date_str else prod_df['생산일자'].max()
+        all_dates = pd.date_range(start=start_date, end=end_date, freq='D')
+
+        machine_keys = MACHINE_KEYS
+        all_machines = self.criteria_df[machine_keys].drop_duplicates()
+        if all_machines.empty: raise ReportError("'저가동 기준 파일'에 분석할 설비 정보가 없습니다.")
+
+        capacity_rows = pd.merge(all_machines, self.capacity_df, on=machine_keys, how='left')
+        capacity_rows['이론상 최대 생산량'] = capacity_rows['이론상 최대 생산량'].fillna(0)
+
+        window_df = date_window(prod_df, start, end)[machine_keys + ['생산일자', '생산수량']]
+        window_df = window_df[window_df['생산일자'].isin(all_dates)]
+        self._progress('집계')
+        daily_prod_summary = window_df.groupby(machine_keys + ['생산일자'], observed=True)['생산수량'].sum().reset_index()
+        daily_util_df = pd.merge(daily_prod_summary, capacity_rows, on=machine_keys, how='inner')
+        daily_util_df['일별 가동률(%)'] = ((daily_util_df['생산수량'] / daily_util_df['이론상 최대 생산량'].where(daily_util_df['이론상 최대 생산량'] != 0)) * 100).fillna(0)
+
+        util_totals = daily_util_df.groupby(machine_keys, observed=True)['일별 가동률(%)'].sum().reset_index(name='가동률_합계')
+        avg_util_summary = capacity_rows.groupby(machine_keys).size().reset_index(name='최대생산량_행수')
+        avg_util_summary = pd.merge(avg_util_summary, util_totals, on=machine_keys, how='left')
+        if all_dates.empty: avg_util_summary = avg_util_summary.iloc[:0]
+        avg_util_summary['일별 가동률(%)'] = avg_util_summary['가동률_합계'].fillna(0) / (avg_util_summary['최대생산량_행수'] * len(all_dates))
+        avg_util_summary = avg_util_summary[machine_keys + ['일별 가동률(%)']]
+        if return_daily: return avg_util_summary, daily_util_df[machine_keys + ['생산일자', '생산수량', '이론상 최대 생산량', '일별 가동률(%)']]
+        return avg_util_summary
+
+    def production_history(self):
+        # 설비별 '과거 생산 품목 상세 이력' 문구 (기간과 무관하게 전체 생산 실적 기준). (기계코드, 분류, 함수율, 품명) 중복을 없앤 뒤
+        # 분류/함수율별 품명 목록 → 설비별 문단 순서로 모든 설비를 한 번에 만들고, 생산 실적 파일 지문별로 보관해 기간만 바꾼 재실행에서 재사용
+        fingerprint = self.prod_fingerprint
+        if fingerprint is not None and fingerprint in self._history_cache: return self._history_cache[fingerprint]
+        cube = self._daily_cube()
+        history_df = pd.DataFrame({col: cube[col].astype(object) if col in cube.columns else 'N/A' for col in ['기계코드', '신규분류요약', '함수율', '품명']})
+        history_df = history_df.fillna({'품명': '', '신규분류요약': '', '함수율': ''}).drop_duplicates().sort_values('품명', kind='stable')
+        names = history_df.groupby(['기계코드', '신규분류요약', '함수율'])['품명'].agg(', '.join)
+        parts = ("분류: " + names.index.get_level_values('신규분류요약').astype(str) + ", 함수율: " + names.index.get_level_values('함수율').astype(str)
+                 + "\n  - 품명: " + names.to_numpy().astype(str))
+        history = pd.Series(parts, index=names.index.get_level_values('기계코드')).groupby(level='기계코드', sort=False).agg("\n\n".join).rename(HISTORY_COLUMN)
+        if fingerprint is not None: self._history_cache = {fingerprint: history}
+        return history
+
+    def build_low_utilization_report(self, group_by=(), time_unit='일별', start='', end=''):
+        if self.production_df is None or self.capacity_df is None or self.criteria_df is None:
+            raise ReportError("분석을 위해 '생산 실적', '최대 생산량', '저가동 기준' 파일이 모두 필요합니다.")
+
+        avg_util_summary = self.machine_period_utilization(start, end)
+        report_with_criteria = pd.merge(avg_util_summary, self.criteria_df, on=MACHINE_KEYS, how='left')
+        report_with_criteria.dropna(subset=['저가동설비기준'], inplace=True)
+        low_util_machines = report_with_criteria[report_with_criteria['일별 가동률(%)'] <= report_with_criteria['저가동설비기준']].copy()
+        low_util_machines.rename(columns={'일별 가동률(%)': '기간 내 가동률(%)'}, inplace=True)
+
+        if low_util_machines.empty: raise ReportError("지정된 기간에 기준 미달인 저가동 설비가 없습니다.", 'info')
+
+        self._progress('병합')
+        final_report_df = pd.merge(low_util_machines, self.production_history().reset_index(), on='기계코드', how='left')
+        final_report_df['저가동설비기준'] = final_report_df['저가동설비기준'].round(2).astype(str) + '%'
+        final_report_df['기간 내 가동률(%)'] = final_report_df['기간 내 가동률(%)'].round(2).astype(str) + '%'
+        final_report_df = final_report_df[['공장', '공정코드', '기계코드', '저가동설비기준', '기간 내 가동률(%)', HISTORY_COLUMN]]
+        return final_report_df.fillna({HISTORY_COLUMN: '이력 없음'})
+
+    def _defect_frames(self, start='', end=''):
+        # 기간을 거른 불량 실적(위치 슬라이스)과 생산실적번호별 첫 행 표시(생산 수량 집계용 불리언 배열). 같은 기간의 집계 조합끼리 공유
+        key = ('defect', start, end)
+        if key not in self._shared:
+            df = self.defect_df
+            found_defect_cols = [col for col in df.columns if str(col).startswith('불량수량')]
+            if len(found_defect_cols) < 2:
+                raise ReportError(f"'불량실적현황' 파일에 '불량수량'으로 시작하는 컬럼이 2개 이상 필요합니다.\n(현재 {len(found_defect_cols)}개 발견됨)", 'error', "파일 구조 오류")
+
+            df = date_window(df, start, end)
+
+            if df.empty: raise ReportError("선택된 기간에 해당하는 데이터가 없습니다.", 'info')
+            self._shared[key] = (df, ~df['생산실적번호'].duplicated().to_numpy())
+        return self._shared[key]
+
+    def build_defect_grouping_sets(self, grouping_sets, start='', end=''):
+        # 여러 집계 조합(예: 공장 / 공장+불량명 / 공장+사출기계코드+불량명)을 한 번 거른 같은 기반에서 만들어 조합별 시트로 반환
+        if self.defect_df is None: raise ReportError("'불량 실적 파일'을 선택해야 합니다.")
+        sheets = {}
+        for group_by in dict.fromkeys(tuple(group_by) for group_by in grouping_sets if group_by):
+            sheet_name = '+'.join(group_by)[:31]
+            if sheet_name in sheets: sheet_name = f"{sheet_name[:28]}_{len(sheets) + 1}"
+            sheets[sheet_name] = self.build_defect_report(list(group_by), start=start, end=end)
+        if not sheets: raise ReportError("불량 원인 분석 집계 조합을 하나 이상 추가해주세요.")
+        return sheets
+
+    def build_defect_report(self, group_by, time_unit='일별', start='', end=''):
+        if self.defect_df is None: raise ReportError("'불량 실적 파일'을 선택해야 합니다.")
+        if not group_by: raise ReportError("집계 기준을 하나 이상 선택해주세요. (예: 공장, 불량명)")
+
+        self._progress('기간 필터링')
+        df, first_run_rows = self._defect_frames(start, end)
+        self._progress('집계')
+        prod_group_cols = [col for col in group_by if col != '불량명' and col in df.columns]
+        detail_group_cols = [col for col in group_by if col in df.columns]
+        if not detail_group_cols: raise ReportError("'데이터 요약 기준'에서 유효한 컬럼을 선택하세요.")
+
+        shards = self._shards(df)
+        if shards is None:
+            prod_agg_df, defect_agg_df = aggregate_defect_shard(df, first_run_rows, prod_group_cols, detail_group_cols)
+        else:
+            # 생산실적번호 중복 표시는 전체 기준으로 정한 뒤 나누므로, 조각별 합계를 다시 더하면 한 번에 집계한 결과와 같음
+            columns = list(dict.fromkeys(detail_group_cols + ['양품수량', '불량수량(전체)', '불량수량(유형별)']))
+            parts = self._map_shards(aggregate_defect_shard, [(df.iloc[rows][columns], first_run_rows[rows], prod_group_cols, detail_group_cols) for rows in shards])
+            prod_parts = pd.concat([prod_part for prod_part, _ in parts], ignore_index=True)
+            prod_agg_df = prod_parts.groupby(prod_group_cols, observed=True).sum().reset_index() if prod_group_cols else prod_parts.sum().to_frame().T.astype(prod_parts.dtypes)
+            defect_agg_df = pd.concat([defect_part for _, defect_part in parts], ignore_index=True).groupby(detail_group_cols, observed=True).sum().reset_index()
+
+        prod_agg_df['생산수량'] = prod_agg_df['양품수량'] + prod_agg_df['불량수량_전체_집계']
+
+        self._progress('병합')
+        if prod_group_cols:
+            final_df = pd.merge(defect_agg_df, prod_agg_df, on=prod_group_cols, how='left')
+        else:
+            final_df = defect_agg_df.assign(**prod_agg_df.iloc[0])
+
+        final_df['불량률(%)'] = (final_df['불량수량_전체_집계'] / final_df['생산수량'] * 100).where(final_df['생산수량'] > 0, 0)
+        final_df['분석일시'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        final_df.rename(columns={'불량수량_전체_집계': '불량수량(전체)', '불량수량_유형별_집계': '불량수량(유형별)'}, inplace=True)
+
+        final_cols_order = detail_group_cols + [
+            '생산수량', '양품수량', '불량수량(전체)', '불량수량(유형별)', '불량률(%)', '분석일시'
+        ]
+        final_df = final_df[[col for col in final_cols_order if col in final_df.columns]]
+        return final_df.sort_values(by=detail_group_cols, ascending=True)
+
+def run_batch(start='', end='', time_unit='일별', store_path=None, jobs_path=None, shard_workers=0, shard_by_month=False):
+    # 야간 배치용: 입력 파일을 한 번 읽고 다섯 보고서를 모두 생성 (예상하지 못한 오류가 있으면 종료 코드 1)
+    # store_path를 주면 생산 실적은 엑셀 대신 누적 저장소에서 읽고, jobs_path를 주면 배치 정의 파일의 작업들을 대신 실행
+    try: jobs = load_batch_jobs(jobs_path, start, end) if jobs_path else None
+    except Exception as e: print(f"[배치 정의] {jobs_path}: 읽기 오류 - {e}"); return 1
+    engine = ProductionReportEngine(shard_workers, shard_by_month)
+    found_files = [(file_path, file_type) for file_path, file_type in find_input_files() if not (store_path and file_type == 'prod')]
+    for file_path, file_type, result in engine.load_inputs(found_files):
+        print(f"[입력] {file_path}: {result if isinstance(result, str) else f'읽기 오류 - {result}'}")
+    if store_path:
+        try: print(f"[입력] {store_path}: {engine.load_production_store(store_path)}")
+        except Exception as e: print(f"[입력] {store_path}: 읽기 오류 - {e}")
+    if jobs is not None: results = engine.run_jobs(jobs)
+    else: results = engine.run_batch(load_report_settings()[0], start, end, time_unit)
+    exit_code = 0
+    for name, save_path, error in results:
+        if save_path: print(f"[{name}] 생성 완료: {save_path}")
+        elif isinstance(error, ReportError): print(f"[{name}] 건너뜀: {error}")
+        else: print(f"[{name}] 오류: {error}"); exit_code = 1
+    return exit_code
 
 class ProductionAnalyzerAppTrueFinal:
     def __init__(self, master):
@@ -14,11 +930,7 @@ class ProductionAnalyzerAppTrueFinal:
         self.master.title("지능형 생산 분석 시스템 (v3.3 - DB 최적화)")
         self.master.geometry("850x850")
 
-        self.production_df, self.capacity_df, self.criteria_df, self.defect_df = None, None, None, None
-        self.target_dfs = {}
-        self.available_target_dates = []
-
-        self.prod_file_path = ""
+        self.engine = ProductionReportEngine()
         self.yield_settings, self.util_settings, self.target_settings, self.defect_settings = {}, {}, {}, {}
 
         main_frame = ttk.Frame(self.master, padding="10")
@@ -46,18 +958,29 @@ class ProductionAnalyzerAppTrueFinal:
         agg_frame.pack(fill="x", padx=5, pady=5)
         ttk.Label(agg_frame, text="시간 단위:").pack(side="left", padx=5, pady=5)
         self.time_agg_var = tk.StringVar(value='일별')
-        self.time_agg_combo = ttk.Combobox(agg_frame, textvariable=self.time_agg_var, values=['일별', '주간별', '월별', '연도별'], state="readonly")
+        self.time_agg_combo = ttk.Combobox(agg_frame, textvariable=self.time_agg_var, values=TIME_UNITS, state="readonly")
         self.time_agg_combo.pack(side="left", padx=5, pady=5, fill="x", expand=True)
 
         mode_frame = ttk.LabelFrame(main_frame, text="4. 분석 모드 선택"); mode_frame.pack(fill="x", padx=5, pady=5); self.mode_var = tk.StringVar(value="수율 분석");
-        modes = ["수율 분석", "가동률 분석", "목표 달성률 분석", "저가동 설비 분석", "불량 원인 분석"]
+        modes = list(REPORT_SPECS)
         [ttk.Radiobutton(mode_frame, text=mode, variable=self.mode_var, value=mode, command=self.on_mode_change).pack(side="left", padx=10, pady=5) for mode in modes]
 
         self.group_by_frame = ttk.LabelFrame(main_frame, text="5. 데이터 요약 기준"); self.group_by_frame.pack(fill="x", padx=5, pady=5); self.group_vars = {};
-        group_options = ['생산일자', '공장', '공정코드', '신규분류요약', '함수율', '품명', '기계코드', '사출기계코드', '공정기계코드', '불량명']
-        [self.group_vars.update({option: tk.BooleanVar()}) or ttk.Checkbutton(self.group_by_frame, text=option, variable=self.group_vars[option]).grid(row=i//5, column=i%5, padx=5, pady=5, sticky='w') for i, option in enumerate(group_options)]
+        [self.group_vars.update({option: tk.BooleanVar()}) or ttk.Checkbutton(self.group_by_frame, text=option, variable=self.group_vars[option]).grid(row=i//5, column=i%5, padx=5, pady=5, sticky='w') for i, option in enumerate(GROUP_OPTIONS)]
+
+        # 불량 원인 분석 전용: 저장해 둔 여러 집계 조합을 한 번에 조합별 시트로 생성
+        self.grouping_sets_frame = ttk.LabelFrame(main_frame, text="6. 불량 보고서 집계 조합 (조합별 시트)")
+        self.use_grouping_sets_var = tk.BooleanVar()
+        ttk.Checkbutton(self.grouping_sets_frame, text="저장된 조합 모두 생성", variable=self.use_grouping_sets_var).pack(side="left", padx=5, pady=5)
+        ttk.Button(self.grouping_sets_frame, text="현재 기준을 조합에 추가", command=self.add_grouping_set).pack(side="left", padx=5, pady=5)
+        ttk.Button(self.grouping_sets_frame, text="조합 비우기", command=self.clear_grouping_sets).pack(side="left", padx=5, pady=5)
+        self.grouping_sets_label = ttk.Label(self.grouping_sets_frame, text="", foreground="gray"); self.grouping_sets_label.pack(side="left", padx=5, pady=5, fill="x", expand=True)
 
         action_frame = ttk.Frame(main_frame); action_frame.pack(fill="x", padx=5, pady=20); self.generate_button = ttk.Button(action_frame, text="보고서 생성", command=self.generate_report); self.generate_button.pack(pady=5, fill="x", ipady=5)
+        progress_frame = ttk.Frame(action_frame); progress_frame.pack(fill="x")
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="determinate", maximum=100); self.progress_bar.pack(side="left", fill="x", expand=True, padx=(0, 5))
+        self.cancel_button = ttk.Button(progress_frame, text="취소", command=self.cancel_report, state="disabled"); self.cancel_button.pack(side="right")
+        self.report_thread, self.cancel_event, self.report_queue = None, threading.Event(), queue.Queue()
 
         self.status_bar = ttk.Label(self.master, text="준비 완료", relief="sunken", anchor="w", padding=5); self.status_bar.pack(side="bottom", fill="x")
 
@@ -67,277 +990,26 @@ class ProductionAnalyzerAppTrueFinal:
         self.on_mode_change(is_initial_call=True)
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-    def _save_multisheet_excel_autofit(self, sheets_data, file_path):
-        from openpyxl.utils import get_column_letter
-        from openpyxl.styles import Alignment
-
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            for sheet_name, df in sheets_data.items():
-                df.to_excel(writer, index=False, sheet_name=sheet_name)
-                worksheet = writer.sheets[sheet_name]
-                history_col_name = '과거 생산 품목 상세 이력'
-
-                for i, column_name in enumerate(df.columns, 1):
-                    column_letter = get_column_letter(i)
-                    if column_name == history_col_name:
-                        worksheet.column_dimensions[column_letter].width = 99
-                        for cell in worksheet[column_letter]:
-                            cell.alignment = Alignment(wrap_text=True, vertical='top')
-                    else:
-                        try:
-                            max_length = max((df[column_name].astype(str).map(len).max(), len(str(column_name))))
-                            worksheet.column_dimensions[column_letter].width = max_length + 4
-                        except (ValueError, TypeError):
-                            worksheet.column_dimensions[column_letter].width = len(str(column_name)) + 4
-
-    def _save_df_to_excel_autofit(self, df, file_path):
-        from openpyxl.utils import get_column_letter
-        from openpyxl.styles import Alignment
-
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Summary')
-            worksheet = writer.sheets['Summary']
-            history_col_name = '과거 생산 품목 상세 이력'
-
-            for i, column_name in enumerate(df.columns, 1):
-                column_letter = get_column_letter(i)
-                if column_name == history_col_name:
-                    worksheet.column_dimensions[column_letter].width = 99
-                    for cell in worksheet[column_letter]:
-                        cell.alignment = Alignment(wrap_text=True, vertical='top')
-                else:
-                    try:
-                        max_length = max((df[column_name].astype(str).map(len).max(), len(str(column_name))))
-                        worksheet.column_dimensions[column_letter].width = max_length + 2
-                    except (ValueError, TypeError):
-                        worksheet.column_dimensions[column_letter].width = len(str(column_name)) + 2
-
-    def generate_defect_report(self):
-        self.status_bar.config(text="불량 원인 분석 보고서 생성 중...")
-        self.master.update()
-        if self.defect_df is None:
-            messagebox.showwarning("경고", "'불량 실적 파일'을 선택해야 합니다.")
-            return
-
-        group_by_columns = [col for col, var in self.group_vars.items() if var.get()]
-        if not group_by_columns:
-            messagebox.showwarning("경고", "집계 기준을 하나 이상 선택해주세요. (예: 공장, 불량명)")
-            return
-
+    def _load_file(self, file_path, file_type):
+        if self.report_thread is not None: messagebox.showwarning("경고", "보고서를 생성하는 동안에는 입력 파일을 바꿀 수 없습니다."); return
+        self.status_bar.config(text=f"'{os.path.basename(file_path)}' 읽는 중..."); self.master.update()
         try:
-            df = self.defect_df.copy()
-
-            original_cols = list(df.columns)
-            found_defect_cols = [col for col in original_cols if str(col).startswith('불량수량')]
-
-            if len(found_defect_cols) < 2:
-                messagebox.showerror("파일 구조 오류", f"'불량실적현황' 파일에 '불량수량'으로 시작하는 컬럼이 2개 이상 필요합니다.\n(현재 {len(found_defect_cols)}개 발견됨)")
-                return
-                
-            df.rename(columns={
-                found_defect_cols[0]: '불량수량(전체)',
-                found_defect_cols[1]: '불량수량(유형별)'
-            }, inplace=True)
-
-            df['생산일자'] = pd.to_datetime(df['생산일자'].astype(str).str.replace('.', '-'), errors='coerce')
-            df.dropna(subset=['생산일자'], inplace=True)
-            start_date_str = self.start_date_entry.get().replace('.', '-')
-            end_date_str = self.end_date_entry.get().replace('.', '-')
-            if start_date_str: df = df[df['생산일자'] >= pd.to_datetime(start_date_str)]
-            if end_date_str: df = df[df['생산일자'] <= pd.to_datetime(end_date_str)]
-
-            if df.empty:
-                messagebox.showinfo("정보", "선택된 기간에 해당하는 데이터가 없습니다.")
-                return
-
-            numeric_cols = ['양품수량', '불량수량(전체)', '불량수량(유형별)']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
-
-            prod_runs_df = df.drop_duplicates(subset=['생산실적번호'])
-            prod_group_cols = [col for col in group_by_columns if col != '불량명' and col in df.columns]
-            
-            if prod_group_cols:
-                prod_agg_df = prod_runs_df.groupby(prod_group_cols).agg(
-                    양품수량=('양품수량', 'sum'),
-                    불량수량_전체_집계=('불량수량(전체)', 'sum')
-                ).reset_index()
-            else: # 사용자가 '불량명'만 선택하는 등, 생산량을 묶을 기준이 없는 경우
-                prod_agg_df = pd.DataFrame([{
-                    '양품수량': prod_runs_df['양품수량'].sum(),
-                    '불량수량_전체_집계': prod_runs_df['불량수량(전체)'].sum()
-                }])
-            
-            prod_agg_df['생산수량'] = prod_agg_df['양품수량'] + prod_agg_df['불량수량_전체_집계']
-
-            detail_group_cols = [col for col in group_by_columns if col in df.columns]
-            if not detail_group_cols:
-                 messagebox.showwarning("경고", "'데이터 요약 기준'에서 유효한 컬럼을 선택하세요.")
-                 return
-                 
-            defect_agg_df = df.groupby(detail_group_cols).agg(
-                불량수량_유형별_집계=('불량수량(유형별)', 'sum')
-            ).reset_index()
-
-            if prod_group_cols:
-                final_df = pd.merge(defect_agg_df, prod_agg_df, on=prod_group_cols, how='left')
-            else:
-                final_df = defect_agg_df.assign(**prod_agg_df.iloc[0])
-
-            final_df['불량률(%)'] = (final_df['불량수량_전체_집계'] / final_df['생산수량'] * 100).where(final_df['생산수량'] > 0, 0)
-            final_df['분석일시'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            final_df.rename(columns={'불량수량_전체_집계': '불량수량(전체)', '불량수량_유형별_집계': '불량수량(유형별)'}, inplace=True)
-            
-            final_cols_order = detail_group_cols + [
-                '생산수량', '양품수량', '불량수량(전체)', '불량수량(유형별)', '불량률(%)', '분석일시'
-            ]
-            final_df = final_df[[col for col in final_cols_order if col in final_df.columns]]
-            final_df = final_df.sort_values(by=detail_group_cols, ascending=True)
-
-            save_path = "불량실적현황(최적화).xlsx"
-            sheets_to_save = {"설비별_상세분석": final_df}
-            self._save_multisheet_excel_autofit(sheets_to_save, save_path)
-            messagebox.showinfo("성공", f"최적화된 불량 분석 보고서가 생성되었습니다.\n위치: {save_path}")
-            self.status_bar.config(text="불량 원인 분석 완료.")
-
+            df_dict, from_cache = read_excel_sheets(file_path, file_type)
+            self._store_loaded_sheets(file_path, file_type, df_dict, from_cache)
         except Exception as e:
-            import traceback
-            messagebox.showerror("오류", f"보고서 생성 중 예측하지 못한 오류 발생: {e}\n\n{traceback.format_exc()}")
-            self.status_bar.config(text="오류 발생")
-
+            self._on_load_error(file_path, file_type, e)
 
-    def generate_low_utilization_report(self):
-        self.status_bar.config(text="저가동 설비 분석 중..."); self.master.update()
-        if self.production_df is None or self.capacity_df is None or self.criteria_df is None:
-            messagebox.showwarning("경고", "분석을 위해 '생산 실적', '최대 생산량', '저가동 기준' 파일이 모두 필요합니다.")
-            return
+    def _file_label(self, file_type):
+        return {'prod': self.prod_file_label, 'capa': self.cap_file_label, 'target': self.target_file_label, 'criteria': self.criteria_file_label, 'defect': self.defect_file_label}.get(file_type)
 
-        try:
-            prod_df = self.production_df.copy()
-            prod_df['생산일자'] = pd.to_datetime(prod_df['생산일자'].astype(str).str.replace('.', '-'), errors='coerce')
-            prod_df.dropna(subset=['생산일자'], inplace=True)
-
-            start_date_str = self.start_date_entry.get().replace('.', '-')
-            end_date_str = self.end_date_entry.get().replace('.', '-')
-            start_date = pd.to_datetime(start_date_str) if start_date_str else prod_df['생산일자'].min()
-            end_date = pd.to_datetime(end_date_str) if end_date_str else prod_df['생산일자'].max()
-            all_dates = pd.date_range(start=start_date, end=end_date, freq='D')
-
-            machine_keys = ['공장', '공정코드', '기계코드']
-            all_machines = self.criteria_df[machine_keys].drop_duplicates()
-            if all_machines.empty:
-                messagebox.showwarning("경고", "'저가동 기준 파일'에 분석할 설비 정보가 없습니다."); return
-
-            scaffold_index = pd.MultiIndex.from_product([all_machines.to_records(index=False), all_dates], names=['machine', '생산일자'])
-            scaffold_df = pd.DataFrame(scaffold_index.tolist(), columns=['machine','생산일자'])
-            scaffold_df[machine_keys] = pd.DataFrame(scaffold_df['machine'].tolist(), index=scaffold_df.index)
-            scaffold_df.drop('machine', axis=1, inplace=True)
-
-            prod_df['생산수량'] = pd.to_numeric(prod_df['생산수량'].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
-            daily_prod_summary = prod_df.groupby(machine_keys + ['생산일자'])['생산수량'].sum().reset_index()
-
-            daily_util_df = pd.merge(scaffold_df, daily_prod_summary, on=machine_keys + ['생산일자'], how='left')
-            daily_util_df['생산수량'].fillna(0, inplace=True)
-
-            daily_util_df = pd.merge(daily_util_df, self.capacity_df, on=machine_keys, how='left')
-            daily_util_df['이론상 최대 생산량'].fillna(0, inplace=True)
-
-            daily_util_df['일별 가동률(%)'] = (daily_util_df['생산수량'] / daily_util_df['이론상 최대 생산량'].where(daily_util_df['이론상 최대 생산량'] != 0)) * 100
-            daily_util_df['일별 가동률(%)'].fillna(0, inplace=True)
-
-            avg_util_summary = daily_util_df.groupby(machine_keys)['일별 가동률(%)'].mean().reset_index()
-            report_with_criteria = pd.merge(avg_util_summary, self.criteria_df, on=machine_keys, how='left')
-            report_with_criteria.dropna(subset=['저가동설비기준'], inplace=True)
-            low_util_machines = report_with_criteria[report_with_criteria['일별 가동률(%)'] <= report_with_criteria['저가동설비기준']].copy()
-            low_util_machines.rename(columns={'일별 가동률(%)': '기간 내 가동률(%)'}, inplace=True)
-
-            if low_util_machines.empty:
-                messagebox.showinfo("정보", "지정된 기간에 기준 미달인 저가동 설비가 없습니다."); return
-
-            full_prod_df = self.production_df.copy(); [full_prod_df.__setitem__(col, 'N/A') for col in ['품명', '신규분류요약', '함수율'] if col not in full_prod_df.columns]; full_prod_df.fillna({'품명': '', '신규분류요약': '', '함수율': ''}, inplace=True)
-            history_df = full_prod_df[full_prod_df['기계코드'].isin(low_util_machines['기계코드'].unique())].copy()
-            history_df.drop_duplicates(subset=['기계코드', '품명', '신규분류요약', '함수율'], inplace=True)
-
-            def format_history(df_group):
-                output_parts = [f"분류: {category}, 함수율: {moisture}\n  - 품명: {', '.join(sorted(group['품명'].unique()))}" for (category, moisture), group in df_group.groupby(['신규분류요약', '함수율'])]
-                return "\n\n".join(output_parts)
-            prod_history = history_df.groupby('기계코드').apply(format_history).reset_index(name='과거 생산 품목 상세 이력')
-
-            final_report_df = pd.merge(low_util_machines, prod_history, on='기계코드', how='left')
-            final_report_df['저가동설비기준'] = final_report_df['저가동설비기준'].round(2).astype(str) + '%'
-            final_report_df['기간 내 가동률(%)'] = final_report_df['기간 내 가동률(%)'].round(2).astype(str) + '%'
-            final_report_df = final_report_df[['공장', '공정코드', '기계코드', '저가동설비기준', '기간 내 가동률(%)', '과거 생산 품목 상세 이력']]
-            final_report_df.fillna({'과거 생산 품목 상세 이력': '이력 없음'}, inplace=True)
-
-            save_path = f"{os.path.splitext(self.prod_file_path)[0]}(저가동설비).xlsx"
-            self._save_df_to_excel_autofit(final_report_df, save_path)
-            messagebox.showinfo("성공", f"저가동 설비 분석 보고서가 생성되었습니다.\n위치: {save_path}")
-            self.status_bar.config(text="저가동 설비 분석 완료.")
+    def _store_loaded_sheets(self, file_path, file_type, df_dict, from_cache=False):
+        success_text = self.engine.store_sheets(file_path, file_type, df_dict, from_cache)
+        self._file_label(file_type).config(text=os.path.basename(file_path), foreground="black"); self.status_bar.config(text=success_text)
 
-        except Exception as e:
-            messagebox.showerror("오류", f"보고서 생성 중 오류 발생: {e}"); self.status_bar.config(text="오류 발생")
-
-    def _load_file(self, file_path, file_type):
-        label_widget_map = {'prod': self.prod_file_label, 'capa': self.cap_file_label, 'target': self.target_file_label, 'criteria': self.criteria_file_label, 'defect': self.defect_file_label}
-        success_text_map = {'prod': "생산 실적 로딩 완료", 'capa': "최대 생산량 로딩 완료", 'target': "월별 생산 목표 로딩 완료", 'criteria': "저가동 기준 로딩 완료", 'defect': "불량 실적 로딩 완료"}
-        label_widget, success_text = label_widget_map.get(file_type), success_text_map.get(file_type)
-        if file_type == 'prod': self.prod_file_path = file_path
-        self.status_bar.config(text=f"'{os.path.basename(file_path)}' 읽는 중..."); self.master.update()
-        try:
-            df_dict = pd.read_excel(file_path, sheet_name=None)
-
-            if file_type == 'target':
-                self.target_dfs.clear()
-                all_sheets_df = pd.concat(df_dict.values(), ignore_index=True)
-
-                required_cols = ['년', '월', '공장', '공정코드', '일일_생산목표량']
-                if not all(col in all_sheets_df.columns for col in required_cols):
-                    raise ValueError(f"생산 목표 파일에는 {', '.join(required_cols)} 컬럼이 모두 필요합니다.")
-
-                all_sheets_df.dropna(subset=required_cols, inplace=True)
-                all_sheets_df['년'] = pd.to_numeric(all_sheets_df['년'], errors='coerce').astype('Int64')
-                all_sheets_df['월'] = pd.to_numeric(all_sheets_df['월'], errors='coerce').astype('Int64')
-                all_sheets_df.dropna(subset=['년', '월'], inplace=True)
-                
-                for (year, month), group in all_sheets_df.groupby(['년', '월']):
-                    self.target_dfs[(year, month)] = group
-                
-                self.available_target_dates = sorted(self.target_dfs.keys())
-                
-                if self.available_target_dates:
-                    min_date = f"{self.available_target_dates[0][0]}년 {self.available_target_dates[0][1]}월"
-                    max_date = f"{self.available_target_dates[-1][0]}년 {self.available_target_dates[-1][1]}월"
-                    success_text = f"월별 목표 로딩 완료: {min_date} ~ {max_date}"
-                else:
-                    success_text = "월별 목표 데이터 없음"
-
-                setattr(self, 'target_df_loaded', True)
-
-            elif file_type == 'criteria':
-                df = pd.concat(df_dict.values(), ignore_index=True)
-                criteria_col_name = '저가동설비기준'
-                if criteria_col_name not in df.columns: raise KeyError(f"'{criteria_col_name}' 컬럼을 찾을 수 없습니다. 엑셀 파일의 D열 첫 행에 컬럼명이 올바르게 입력되었는지 확인해주세요.")
-                s = df[criteria_col_name]
-                if pd.api.types.is_numeric_dtype(s) and (s.dropna() <= 1).all() and (s.dropna() > 0).any(): df[criteria_col_name] = s * 100
-                else: df[criteria_col_name] = pd.to_numeric(s.astype(str).str.replace('%', '', regex=False), errors='coerce')
-                df.dropna(subset=[criteria_col_name], inplace=True)
-                self.criteria_df = df
-            else:
-                df_attribute_map = {'prod': 'production_df', 'capa': 'capacity_df', 'defect': 'defect_df'}
-                df_attribute = df_attribute_map.get(file_type)
-                sheets_to_concat = list(df_dict.keys())
-                if not sheets_to_concat: raise ValueError("유효한 시트를 찾을 수 없습니다.")
-                df = pd.concat([df_dict[s] for s in sheets_to_concat], ignore_index=True)
-                setattr(self, df_attribute, df)
-
-            label_widget.config(text=os.path.basename(file_path), foreground="black"); self.status_bar.config(text=success_text)
-        except Exception as e:
-            messagebox.showerror("오류", f"'{os.path.basename(file_path)}' 파일 읽기 오류: {e}")
-            label_widget.config(text="파일 없음", foreground="gray")
-            if file_type == 'criteria': self.criteria_df = None
-            if file_type == 'defect': self.defect_df = None
+    def _on_load_error(self, file_path, file_type, e):
+        messagebox.showerror("오류", f"'{os.path.basename(file_path)}' 파일 읽기 오류: {e}")
+        self._file_label(file_type).config(text="파일 없음", foreground="gray")
+        self.engine.discard(file_type)
 
     def on_mode_change(self, is_initial_call=False):
         settings_map = {"수율 분석": self.yield_settings, "가동률 분석": self.util_settings,
@@ -348,18 +1020,22 @@ class ProductionAnalyzerAppTrueFinal:
             if settings_to_save is not None:
                 for col, var in self.group_vars.items():
                     settings_to_save[col] = var.get()
+            if self.current_mode == "불량 원인 분석": self.defect_settings['use_grouping_sets'] = self.use_grouping_sets_var.get()
 
         new_mode = self.mode_var.get()
         self.group_by_frame.config(text=f"5. 데이터 요약 기준 (현재 모드: {new_mode})")
         self.generate_button.config(text=f"{new_mode} 생성")
 
+        self.grouping_sets_frame.pack_forget()
         if new_mode in ["저가동 설비 분석"]:
             self.group_by_frame.pack_forget()
             self.time_agg_combo.config(state="disabled")
         else:
             self.group_by_frame.pack(fill="x", padx=5, pady=5)
             self.time_agg_combo.config(state="readonly" if new_mode != "불량 원인 분석" else "disabled")
-            if new_mode == "불량 원인 분석": self.time_agg_combo.set('일별')
+            if new_mode == "불량 원인 분석":
+                self.time_agg_combo.set('일별')
+                self.grouping_sets_frame.pack(fill="x", padx=5, pady=5, after=self.group_by_frame); self._refresh_grouping_sets()
 
             settings_to_load = settings_map.get(new_mode, {})
             for col, var in self.group_vars.items():
@@ -367,12 +1043,72 @@ class ProductionAnalyzerAppTrueFinal:
 
         self.current_mode = new_mode
 
+    def _refresh_grouping_sets(self):
+        grouping_sets = self.defect_settings.get('grouping_sets', [])
+        self.use_grouping_sets_var.set(bool(self.defect_settings.get('use_grouping_sets')) and bool(grouping_sets))
+        self.grouping_sets_label.config(text=" / ".join('+'.join(group_by) for group_by in grouping_sets) if grouping_sets else "저장된 조합 없음")
+
+    def add_grouping_set(self):
+        group_by = [col for col, var in self.group_vars.items() if var.get()]
+        if not group_by: messagebox.showwarning("경고", "조합에 추가할 집계 기준을 하나 이상 선택해주세요."); return
+        grouping_sets = self.defect_settings.setdefault('grouping_sets', [])
+        if group_by not in grouping_sets: grouping_sets.append(group_by)
+        self.defect_settings['use_grouping_sets'] = True; self._refresh_grouping_sets()
+
+    def clear_grouping_sets(self):
+        self.defect_settings['grouping_sets'], self.defect_settings['use_grouping_sets'] = [], False; self._refresh_grouping_sets()
+
     def auto_load_default_files(self):
-        keyword_map = {"생산실적현황": 'prod', "가동율참고": 'capa', "생산목표량": 'target', "설비리스트및저가동설비기준": 'criteria', "불량실적현황": 'defect'}
-        exclude_suffixes = ["(수율)", "(가동률)", "(목표달성율)", "(저가동설비)", "(최적화)"]
-        for keyword, file_type in keyword_map.items():
-            found_file = next((f for f in os.listdir('.') if keyword in f and f.endswith('.xlsx') and not any(suffix in f for suffix in exclude_suffixes)), None)
-            if found_file: self._load_file(found_file, file_type)
+        found_files = find_input_files()
+        if not found_files: return
+
+        # 파일(캐시가 없으면 시트) 단위 작업을 프로세스 풀에서 동시에 읽고, 끝나는 대로 after() 폴링으로 GUI에 반영
+        load_plan = []
+        for file_path, file_type in found_files:
+            entry_dir = _cache_entry_dir(file_path, _workbook_variant(file_type))
+            sheet_names = None if os.path.exists(os.path.join(entry_dir, 'manifest.json')) else workbook_sheet_names(file_path)
+            load_plan.append((file_path, file_type, entry_dir, sheet_names))
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            job_count = sum(len(sheet_names) if sheet_names else 1 for _, _, _, sheet_names in load_plan)
+            self.load_executor = ProcessPoolExecutor(max_workers=max(1, min(job_count, os.cpu_count() or 1)))
+            self.pending_loads = {}
+            for file_path, file_type, entry_dir, sheet_names in load_plan:
+                if sheet_names: futures = [self.load_executor.submit(parse_sheet_job, file_path, file_type, name, i) for i, name in enumerate(sheet_names)]
+                else: futures = [self.load_executor.submit(load_cached_workbook_job, file_path, file_type)]
+                self.pending_loads[file_path] = {'file_type': file_type, 'entry_dir': entry_dir, 'sheet_names': sheet_names, 'futures': futures}
+                self._file_label(file_type).config(text=f"{os.path.basename(file_path)} (읽는 중...)", foreground="gray")
+        except (OSError, RuntimeError, ImportError):
+            for file_path, file_type, _, _ in load_plan: self._load_file(file_path, file_type)
+            return
+        self.loaded_file_count, self.total_file_count = 0, len(self.pending_loads)
+        self.generate_button.config(state="disabled")
+        self.status_bar.config(text=f"입력 파일 {self.total_file_count}개를 병렬로 읽는 중...")
+        self.master.after(100, self._poll_load_jobs)
+
+    def _poll_load_jobs(self):
+        for file_path, job in list(self.pending_loads.items()):
+            if not all(future.done() for future in job['futures']): continue
+            del self.pending_loads[file_path]; self.loaded_file_count += 1
+            file_type, sheet_names = job['file_type'], job['sheet_names']
+            try:
+                results = [future.result() for future in job['futures']]
+                if sheet_names:
+                    df_dict, from_cache = {name: df for name, (df, _) in zip(sheet_names, results)}, False
+                    if all(cached for _, cached in results): commit_cached_workbook(job['entry_dir'], sheet_names)
+                else:
+                    df_dict, from_cache = results[0], True
+                    if df_dict is None: df_dict, from_cache = read_excel_sheets(file_path, file_type)
+                self._store_loaded_sheets(file_path, file_type, df_dict, from_cache)
+                self.status_bar.config(text=f"[{self.loaded_file_count}/{self.total_file_count}] {self.status_bar.cget('text')}")
+            except Exception as e:
+                self._on_load_error(file_path, file_type, e)
+        if self.pending_loads:
+            self.master.after(100, self._poll_load_jobs)
+        else:
+            self.load_executor.shutdown(wait=False)
+            self.generate_button.config(state="normal")
+            self.status_bar.config(text=f"입력 파일 {self.total_file_count}개 로딩 완료")
 
     def setup_file_loader(self, parent, text, row, command):
         ttk.Label(parent, text=text).grid(row=row, column=0, padx=5, pady=5, sticky="w"); self.last_label = ttk.Label(parent, text="파일 없음", width=70, foreground="gray"); self.last_label.grid(row=row, column=1, padx=5, pady=5); ttk.Button(parent, text="수동 선택", command=command).grid(row=row, column=2, padx=5, pady=5)
@@ -391,24 +1127,17 @@ class ProductionAnalyzerAppTrueFinal:
     def on_closing(self):
         active_settings = self.get_settings_by_mode(self.current_mode);
         if active_settings is not None: [active_settings.update({col: var.get()}) for col, var in self.group_vars.items()]
+        if self.current_mode == "불량 원인 분석": self.defect_settings['use_grouping_sets'] = self.use_grouping_sets_var.get()
         settings = {"yield_settings": self.yield_settings, "util_settings": self.util_settings, "target_settings": self.target_settings, "defect_settings": self.defect_settings};
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f: json.dump(settings, f, indent=4, ensure_ascii=False)
+        if getattr(self, 'load_executor', None): self.load_executor.shutdown(wait=False, cancel_futures=True)
+        self.cancel_event.set()
         self.master.destroy()
 
     def load_settings(self):
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
-                self.yield_settings = settings.get("yield_settings", {})
-                self.util_settings = settings.get("util_settings", {})
-                self.target_settings = settings.get("target_settings", {})
-                self.defect_settings = settings.get("defect_settings", {})
-            self.status_bar.config(text="이전 설정을 불러왔습니다.")
-        except FileNotFoundError:
-            self.status_bar.config(text="초기 설정입니다.");
-            self.util_settings['기계코드'] = True
-            self.target_settings.update({'공장': True, '공정코드': True})
-            self.defect_settings.update({'공장': True, '사출기계코드': True, '공정기계코드': True, '불량명': True})
+        settings, from_file = load_report_settings()
+        self.yield_settings, self.util_settings, self.target_settings, self.defect_settings = (settings[key] for key in ('yield_settings', 'util_settings', 'target_settings', 'defect_settings'))
+        self.status_bar.config(text="이전 설정을 불러왔습니다." if from_file else "초기 설정입니다.")
 
     def load_production_file(self):
         path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")]);
@@ -422,160 +1151,86 @@ class ProductionAnalyzerAppTrueFinal:
         path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")]);
         if path: self._load_file(path, 'target')
 
-    def _prepare_base_df(self):
-        if self.production_df is None: messagebox.showwarning("경고", "생산 실적 파일을 선택해주세요."); return None
-        df = self.production_df.copy(); numeric_cols = ['양품수량', '불량수량', '샘플수량', '생산수량']; [df.__setitem__(col, pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce').fillna(0)) for col in numeric_cols]
-        df['생산일자'] = pd.to_datetime(df['생산일자'].astype(str).str.replace('.', '-'), errors='coerce'); start_date = self.start_date_entry.get().replace('.', '-'); end_date = self.end_date_entry.get().replace('.', '-')
-        if start_date: df = df[df['생산일자'] >= pd.to_datetime(start_date)]
-        if end_date: df = df[df['생산일자'] <= pd.to_datetime(end_date)]
-        return df
-
-    def _apply_time_aggregation(self, df, group_by_cols):
-        if '생산일자' in group_by_cols:
-            time_agg_unit = self.time_agg_var.get()
-            dt_series = df['생산일자'].dt
-            group_by_cols.remove('생산일자')
-            if time_agg_unit == '일별':
-                df['기간'] = dt_series.strftime('%Y-%m-%d')
-                group_by_cols.insert(0, '기간')
-            elif time_agg_unit == '주간별':
-                week_periods = dt_series.to_period('W')
-                df['기간'] = week_periods.apply(lambda p: f"{p.start_time.strftime('%Y-%m-%d')} ~ {p.end_time.strftime('%Y-%m-%d')}")
-                df['주차'] = week_periods.apply(lambda p: f"{p.start_time.month}월 {(p.start_time.day - 1) // 7 + 1}주차")
-                group_by_cols.insert(0, '주차')
-                group_by_cols.insert(0, '기간')
-            elif time_agg_unit == '월별':
-                df['기간'] = dt_series.to_period('M').astype(str)
-                group_by_cols.insert(0, '기간')
-            elif time_agg_unit == '연도별':
-                df['기간'] = dt_series.year
-                group_by_cols.insert(0, '기간')
-        return df, group_by_cols
-
     def generate_report(self):
+        # 보고서 계산/저장은 작업 스레드에서 하고, 단계별 진행/결과는 큐로 받아 after() 폴링으로 화면에 반영
         mode = self.mode_var.get()
-        handler = {'수율 분석': self.generate_yield_report,
-                   '가동률 분석': self.generate_utilization_report,
-                   '목표 달성률 분석': self.generate_target_report,
-                   '저가동 설비 분석': self.generate_low_utilization_report,
-                   '불량 원인 분석': self.generate_defect_report}.get(mode)
-        if handler: handler()
-
-    def generate_yield_report(self):
-        self.status_bar.config(text="수율 보고서 생성 중..."); self.master.update(); base_df = self._prepare_base_df()
-        if base_df is None: return
-        group_by_columns = [col for col, var in self.group_vars.items() if var.get()]
-        if not group_by_columns: messagebox.showwarning("경고", "집계 기준을 선택해주세요."); return
-        try:
-            base_df, group_by_columns = self._apply_time_aggregation(base_df, group_by_columns)
-            summary = base_df.groupby(group_by_columns).agg(총_생산수량=('생산수량', 'sum'), 총_양품수량=('양품수량', 'sum'), 총_불량수량=('불량수량', 'sum')).reset_index()
-            summary['전체_수율(%)'] = round((summary['총_양품수량'] / summary['총_생산수량'].where(summary['총_생산수량'] != 0)) * 100, 2).fillna(0)
-            save_path = f"{os.path.splitext(self.prod_file_path)[0]}(수율).xlsx"
-            self._save_df_to_excel_autofit(summary, save_path); messagebox.showinfo("성공", f"수율 보고서가 생성되었습니다.\n위치: {save_path}"); self.status_bar.config(text="수율 보고서 생성 완료.")
-        except Exception as e: messagebox.showerror("오류", f"보고서 생성 중 오류 발생: {e}")
-
-    def generate_utilization_report(self):
-        self.status_bar.config(text="가동률 보고서 생성 중..."); self.master.update();
-        if self.capacity_df is None: messagebox.showwarning("경고", "'최대 생산량 파일'을 선택해야 합니다."); return
-        base_df = self._prepare_base_df();
-        if base_df is None: return
-        group_by_columns = [col for col, var in self.group_vars.items() if var.get()]
-        if not group_by_columns: messagebox.showwarning("경고", "집계 기준을 선택해주세요."); return
-        try:
-            base_df, group_by_columns = self._apply_time_aggregation(base_df, group_by_columns)
-            merged_df = pd.merge(base_df, self.capacity_df, on=['공장', '공정코드', '기계코드'], how='left'); merged_df['이론상 최대 생산량'].fillna(0, inplace=True)
-            agg_dict = {'총_생산수량': ('생산수량', 'sum'), '총_양품수량': ('양품수량', 'sum'), '일일_최대생산량': ('이론상 최대 생산량', 'first'), '운영일수': ('생산일자', 'nunique')}
-            summary = merged_df.groupby(group_by_columns).agg(**agg_dict).reset_index()
-            if self.time_agg_var.get() == '주간별': summary['운영일수'] = 7
-            summary['이론상_총_생산량'] = summary['일일_최대생산량'] * summary['운영일수']
-            summary['전체_수율(%)'] = round((summary['총_양품수량'] / summary['총_생산수량'].where(summary['총_생산수량'] != 0)) * 100, 2).fillna(0)
-            summary['가동률(%)'] = round((summary['총_생산수량'] / summary['이론상_총_생산량'].where(summary['이론상_총_생산량'] != 0)) * 100, 2).fillna(0)
-            final_cols = group_by_columns + ['총_생산수량', '총_양품수량', '전체_수율(%)', '운영일수', '이론상_총_생산량', '가동률(%)']
-            summary = summary[[col for col in final_cols if col in summary.columns]]
-            save_path = f"{os.path.splitext(self.prod_file_path)[0]}(가동률).xlsx"
-            self._save_df_to_excel_autofit(summary, save_path); messagebox.showinfo("성공", f"가동률 보고서가 생성되었습니다.\n위치: {save_path}"); self.status_bar.config(text="가동률 보고서 생성 완료.")
-        except Exception as e: messagebox.showerror("오류", f"보고서 생성 중 오류 발생: {e}")
-
-    def _find_closest_target_df(self, year, month):
-        target_date = (year, month)
-        if target_date in self.target_dfs:
-            return self.target_dfs[target_date]
-
-        # Find the closest past date
-        past_dates = [d for d in self.available_target_dates if d < target_date]
-        if past_dates:
-            return self.target_dfs[max(past_dates)]
-
-        # Find the closest future date
-        future_dates = [d for d in self.available_target_dates if d > target_date]
-        if future_dates:
-            return self.target_dfs[min(future_dates)]
-
-        return None
-
-    def generate_target_report(self):
-        self.status_bar.config(text="목표 달성률 보고서 생성 중..."); self.master.update()
-        if not hasattr(self, 'target_df_loaded') or not self.target_dfs:
-            messagebox.showwarning("경고", "'월별 생산 목표 파일'을 선택해야 합니다.")
-            return
-        base_df = self._prepare_base_df()
-        if base_df is None: return
+        if mode not in REPORT_SPECS or self.report_thread is not None: return
         group_by_columns = [col for col, var in self.group_vars.items() if var.get()]
-        if not group_by_columns:
-            messagebox.showwarning("경고", "집계 기준을 선택해주세요.")
+        grouping_sets = self.defect_settings.get('grouping_sets') if mode == "불량 원인 분석" and self.use_grouping_sets_var.get() else None
+        args = (mode, group_by_columns, self.time_agg_var.get(), self.start_date_entry.get(), self.end_date_entry.get(), grouping_sets)
+
+        self.cancel_event.clear(); self.engine.progress = self._report_progress
+        self.generate_button.config(state="disabled"); self.cancel_button.config(state="normal"); self.progress_bar['value'] = 0
+        self.status_bar.config(text=REPORT_SPECS[mode][2])
+        self.report_thread = threading.Thread(target=self._generate_worker, args=args, daemon=True); self.report_thread.start()
+        self.master.after(100, self._poll_report_job, mode)
+
+    def _report_progress(self, stage):
+        # 작업 스레드에서 호출됨: 위젯은 건드리지 않고 큐에만 넣음
+        if self.cancel_event.is_set(): raise ReportCancelled()
+        self.report_queue.put(('progress', stage))
+
+    def _generate_worker(self, *args):
+        try: self.report_queue.put(('done', self.engine.generate(*args)))
+        except Exception as e: self.report_queue.put(('error', e))
+
+    def _poll_report_job(self, mode):
+        _, _, running_text, success_text, done_text = REPORT_SPECS[mode]
+        while True:
+            try: kind, payload = self.report_queue.get_nowait()
+            except queue.Empty: break
+            if kind == 'progress':
+                self.progress_bar['value'] = max(self.progress_bar['value'] or 0, REPORT_STAGES.get(payload, 0))
+                self.status_bar.config(text=f"{running_text} ({payload})"); continue
+            self.report_thread, self.engine.progress = None, None
+            self.generate_button.config(state="normal"); self.cancel_button.config(state="disabled")
+            if kind == 'done':
+                self.progress_bar['value'] = 100
+                messagebox.showinfo("성공", f"{success_text}\n위치: {payload}"); self.status_bar.config(text=done_text)
+            elif isinstance(payload, ReportError):
+                self.progress_bar['value'] = 0; self.status_bar.config(text=str(payload) if isinstance(payload, ReportCancelled) else "준비 완료")
+                {'warning': messagebox.showwarning, 'info': messagebox.showinfo, 'error': messagebox.showerror}[payload.level](payload.title, str(payload))
+            else:
+                self.progress_bar['value'] = 0
+                messagebox.showerror("오류", f"보고서 생성 중 오류 발생: {payload}"); self.status_bar.config(text="오류 발생")
             return
-        try:
-            base_df['연도'] = base_df['생산일자'].dt.year
-            base_df['월'] = base_df['생산일자'].dt.month
-
-            processed_dfs = []
-            for (prod_year, prod_month), group in base_df.groupby(['연도', '월']):
-                target_df = self._find_closest_target_df(prod_year, prod_month)
-                if target_df is not None:
-                    merged_month_df = pd.merge(group, target_df, on=['공장', '공정코드'], how='left')
-                    processed_dfs.append(merged_month_df)
-
-            if not processed_dfs:
-                messagebox.showinfo("정보", "선택된 기간에 해당하는 생산 목표 데이터가 없습니다.")
-                return
-
-            merged_df = pd.concat(processed_dfs, ignore_index=True)
-            merged_df.dropna(subset=['일일_생산목표량'], inplace=True)
-            merged_df = merged_df[merged_df['일일_생산목표량'] > 0]
-
-            if merged_df.empty:
-                messagebox.showinfo("정보", "유효한 생산 목표가 설정된 공정이 없습니다.")
-                return
-
-            merged_df, group_by_columns = self._apply_time_aggregation(merged_df, group_by_columns)
-
-            agg_dict = {
-                '총_생산수량': ('생산수량', 'sum'),
-                '총_양품수량': ('양품수량', 'sum'),
-                '일일_목표량': ('일일_생산목표량', 'first'),
-                '운영일수': ('생산일자', 'nunique')
-            }
-            summary = merged_df.groupby(group_by_columns).agg(**agg_dict).reset_index()
-
-            if self.time_agg_var.get() == '주간별': summary['운영일수'] = 7
-            summary['목표_총_생산량'] = summary['일일_목표량'] * summary['운영일수']
-            
-            summary['양품수_기준_달성률(%)'] = round((summary['총_양품수량'] / summary['목표_총_생산량'].where(summary['목표_총_생산량'] != 0)) * 100, 2).fillna(0)
-            
-            final_cols_order = group_by_columns + [
-                '총_양품수량', '총_생산수량', '목표_총_생산량', '양품수_기준_달성률(%)',
-                '일일_목표량', '운영일수'
-            ]
-            summary = summary[[col for col in final_cols_order if col in summary.columns]]
-
-            save_path = f"{os.path.splitext(self.prod_file_path)[0]}(목표달성율).xlsx"
-            self._save_df_to_excel_autofit(summary, save_path)
-            messagebox.showinfo("성공", f"목표 달성률 보고서가 생성되었습니다.\n위치: {save_path}")
-            self.status_bar.config(text="목표 달성률 보고서 생성 완료.")
-        except Exception as e:
-            messagebox.showerror("오류", f"보고서 생성 중 오류 발생: {e}")
+        self.master.after(100, self._poll_report_job, mode)
+
+    def cancel_report(self):
+        # 계산 중인 pandas 연산은 끊을 수 없으므로 다음 단계로 넘어갈 때 취소됨
+        if self.report_thread is None: return
+        self.cancel_event.set(); self.cancel_button.config(state="disabled"); self.status_bar.config(text="취소하는 중...")
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="지능형 생산 분석 시스템")
+    parser.add_argument('--batch', action='store_true', help="GUI 없이 현재 폴더의 입력 파일로 모든 보고서를 생성")
+    parser.add_argument('--start', default='', help="시작일 (예: 2024-01-01, 비우면 전체 기간)")
+    parser.add_argument('--end', default='', help="종료일 (예: 2024-12-31, 비우면 전체 기간)")
+    parser.add_argument('--time-unit', default='일별', choices=TIME_UNITS, help="시간 단위")
+    parser.add_argument('--ingest', nargs='+', metavar='FILE', help="생산 실적 파일의 새 생산실적번호 행만 저장소에 추가")
+    parser.add_argument('--from-store', action='store_true', help="--batch에서 생산 실적을 저장소에서 읽음")
+    parser.add_argument('--store', default=PRODUCTION_STORE, help="생산 실적 저장소 경로")
+    parser.add_argument('--shards', type=int, default=0, metavar='N', help="--batch에서 공장별 조각 집계를 N개 프로세스로 병렬 실행 (0이면 사용 안 함)")
+    parser.add_argument('--shard-by-month', action='store_true', help="--shards 사용 시 공장 × 월 단위로 더 잘게 나눔")
+    parser.add_argument('--jobs', nargs='?', const=BATCH_FILE, metavar='FILE', help=f"--batch에서 배치 정의 파일(기본: {BATCH_FILE})의 (모드, 집계 기준, 시간 단위, 기간) 작업들을 실행")
+    args = parser.parse_args(argv)
+
+    if args.ingest:
+        for file_path in args.ingest:
+            try:
+                inserted, skipped = ingest_production_file(file_path, args.store)
+                print(f"[저장소] {file_path}: {inserted:,}행 추가, {skipped:,}행 건너뜀 (중복/번호 없음)")
+            except Exception as e:
+                print(f"[저장소] {file_path}: 추가 실패 - {e}"); return 1
+    if args.batch: return run_batch(args.start, args.end, args.time_unit, args.store if args.from_store else None, args.jobs, args.shards, args.shard_by_month)
+    if args.ingest: return 0
 
-if __name__ == '__main__':
     root = tk.Tk()
     app = ProductionAnalyzerAppTrueFinal(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    return 0
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
\ No newline at end of file
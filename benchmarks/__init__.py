@@ -0,0 +1 @@
+# 합성 데이터로 분석기 모드/대시보드 탭의 처리 시간과 최대 메모리를 재는 벤치마크 모음
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_inputs
+from benchmarks.targets import DASHBOARD_PATH, DASHBOARD_TABS, load_analyzer, load_dashboard_helpers
+
+# 분석 모드별 벤치마크 집계 기준 (대시보드 입력으로도 쓰이므로 대시보드가 기대하는 컬럼을 포함)
+ANALYZER_GROUP_BY = {
+    '수율 분석': ['생산일자', '공장', '공정코드', '신규분류요약'],
+    '가동률 분석': ['생산일자', '공장', '공정코드', '기계코드'],
+    '목표 달성률 분석': ['생산일자', '공장', '공정코드'],
+    '저가동 설비 분석': [],
+    '불량 원인 분석': ['생산일자', '공장', '신규분류요약', '사출기계코드', '공정기계코드', '불량명'],
+}
+TIME_UNIT_MODES = ['수율 분석', '가동률 분석', '목표 달성률 분석']
+# 대시보드 데이터 가공 경로: (데이터셋, 합산 지표, 묶음 기준)
+DASHBOARD_AGGREGATIONS = [
+    ('target', ['목표_총_생산량', '총_양품수량'], ['period', '공장', '공정코드']),
+    ('yield', ['총_생산수량', '총_양품수량'], ['period', '공장', '공정코드']),
+    ('yield', ['총_생산수량', '총_양품수량'], ['period', '신규분류요약', '공정코드']),
+    ('utilization', ['총_생산수량', '이론상_총_생산량'], ['period', '공장', '공정코드']),
+    ('defect', ['유형별_불량수량'], ['period', '불량명']),
+]
+DASHBOARD_AGG_LEVELS = ['일별', '주간별', '월별', '분기별', '반기별', '년도별']
+REGRESSION_MIN_SECONDS = 0.05
+# 샤딩 일치 검사에 쓰는 엔진 설정 (공장별, 공장×월별)
+SHARD_SETTINGS = [{'shard_workers': 2}, {'shard_workers': 3, 'shard_by_month': True}]
+
+class Recorder:
+    # 단계별 소요 시간과 (선택) tracemalloc 최대 메모리를 기록
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.results = []
+
+    @contextmanager
+    def measure(self, target, name, phase, rows):
+        entry = {'target': target, 'name': name, 'phase': phase, 'rows': rows}
+        if self.trace_memory: tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            yield entry
+        except Exception as e:
+            entry['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            entry['seconds'] = round(time.perf_counter() - started, 4)
+            if self.trace_memory:
+                entry['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 2); tracemalloc.stop()
+            self.results.append(entry)
+            print(f"{target:>14} | {rows:>10,} | {name} [{phase}] {entry['seconds']:.3f}s" + (f" {entry['peak_mb']:.1f}MB" if self.trace_memory else "") + (f" !! {entry['error']}" if 'error' in entry else ""))
+
+def bench_analyzer(analyzer, data_dir, rows, recorder):
+    # 입력 로딩(최초/캐시) → 정규화 → 모드별 집계 → 저장 순서로 측정하고, 대시보드 입력이 될 일별 보고서를 남김
+    shutil.rmtree(analyzer.CACHE_DIR, ignore_errors=True)
+    engine = analyzer.ProductionReportEngine()
+    for file_path, file_type in analyzer.find_input_files():
+        with recorder.measure('analyzer', file_type, 'load', rows): df_dict, _ = analyzer.read_excel_sheets(file_path, file_type)
+        with recorder.measure('analyzer', file_type, 'load_cached', rows): df_dict, _ = analyzer.read_excel_sheets(file_path, file_type)
+        with recorder.measure('analyzer', file_type, 'normalize', rows): engine.store_sheets(file_path, file_type, df_dict)
+
+    for mode, group_by in ANALYZER_GROUP_BY.items():
+        # 일별을 마지막에 실행해서 저장되는 결과 파일이 대시보드 입력(일별 보고서)이 되게 함
+        for time_unit in (['연도별', '월별', '주간별', '일별'] if mode in TIME_UNIT_MODES else ['일별']):
+            report_df = None
+            with recorder.measure('analyzer', mode, f"aggregate[{time_unit}]", rows): report_df = engine.build(mode, group_by, time_unit)
+            if report_df is None: continue
+            with recorder.measure('analyzer', mode, f"write[{time_unit}]", rows): engine.save(mode, report_df)
+
+def check_shard_equivalence(analyzer, rows):
+    # 모든 분석 모드를 샤딩 없이/샤딩으로 만들어 결과 프레임이 같은지 확인하고, 다른 항목 목록을 반환 (합성 입력에는 빈 공장/생산일자 행이 포함됨)
+    engines = [analyzer.ProductionReportEngine(**settings) for settings in [{}] + SHARD_SETTINGS]
+    for file_path, file_type in analyzer.find_input_files():
+        df_dict, _ = analyzer.read_excel_sheets(file_path, file_type)
+        for engine in engines: engine.store_sheets(file_path, file_type, df_dict)
+    group_by_sets = {mode: [group_by] for mode, group_by in ANALYZER_GROUP_BY.items()}
+    group_by_sets['불량 원인 분석'].append(['공정코드', '사출기계코드', '불량명'])
+    mismatches = []
+    for mode, group_by_list in group_by_sets.items():
+        for group_by in group_by_list:
+            for time_unit in (['연도별', '월별', '주간별', '일별'] if mode in TIME_UNIT_MODES else ['일별']):
+                results = []
+                for engine in engines:
+                    try: report_df = engine.build(mode, group_by, time_unit)
+                    except analyzer.ReportError as e: report_df = f"ReportError: {e}"
+                    results.append(report_df.drop(columns='분석일시', errors='ignore') if isinstance(report_df, pd.DataFrame) else report_df)
+                for settings, result in zip(SHARD_SETTINGS, results[1:]):
+                    same = result.equals(results[0]) if isinstance(result, pd.DataFrame) and isinstance(results[0], pd.DataFrame) else result == results[0]
+                    if not same: mismatches.append((rows, mode, '/'.join(group_by), time_unit, settings))
+    for rows_count, mode, group_by, time_unit, settings in mismatches:
+        print(f"[샤딩 불일치] {rows_count:,}행 {mode} [{group_by}] {time_unit} {settings}")
+    return mismatches
+
+def bench_dashboard_prep(dashboard, data_dir, rows, recorder):
+    # 대시보드의 파일 읽기/정규화/기간 집계 함수를 UI 없이 측정
+    load_dataset = getattr(dashboard.load_dataset, '__wrapped__', dashboard.load_dataset)
+    frames, rollups, bounds_by_key = {}, {}, {}
+    for key, file_name in dashboard.find_latest_dataset_files(data_dir).items():
+        if not file_name: continue
+        file_path = os.path.join(data_dir, file_name)
+        with recorder.measure('dashboard', key, 'load', rows): frames[key], _ = load_dataset(key, file_path, os.path.getsize(file_path), os.path.getmtime(file_path))
+        if key == 'low_util': continue
+        with recorder.measure('dashboard', key, 'normalize', rows): frames[key] = dashboard.sort_by_date(dashboard.normalize_process_codes(dashboard.add_date_column(frames[key])))
+        bounds = bounds_by_key[key] = dashboard.date_bounds([frames[key]])
+        if key in dashboard.ROLLUP_SPECS:
+            with recorder.measure('dashboard', key, 'rollup', rows): rollups[key] = dashboard.build_rollups(frames[key], *dashboard.ROLLUP_SPECS[key])
+        if bounds is None: continue
+        with recorder.measure('dashboard', key, 'filter', rows): dashboard.filter_date_range(frames[key], bounds[0] + (bounds[1] - bounds[0]) / 4, bounds[1] - (bounds[1] - bounds[0]) / 4)
+
+    for key, metrics, group_by_cols in DASHBOARD_AGGREGATIONS:
+        if key not in frames: continue
+        for agg_level in DASHBOARD_AGG_LEVELS:
+            with recorder.measure('dashboard', f"{key}:{'/'.join(group_by_cols[1:])}", f"aggregate[{agg_level}]", rows):
+                dashboard.get_resampled_data(frames[key], agg_level, metrics, group_by_cols=group_by_cols)
+            if key not in rollups or bounds_by_key[key] is None: continue
+            with recorder.measure('dashboard', f"{key}:{'/'.join(group_by_cols[1:])}", f"aggregate_rollup[{agg_level}]", rows):
+                dashboard.rollup_resampled_data(rollups[key], agg_level, *bounds_by_key[key], metrics, group_by_cols)
+
+def bench_dashboard_tabs(data_dir, rows, recorder):
+    # Streamlit AppTest로 탭 전체 스크립트 실행 시간을 측정 (첫 실행은 파일 로딩 포함)
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit.testing을 불러올 수 없어 대시보드 탭 측정을 건너뜁니다."); return
+    import logging
+    for logger_name in [name for name in logging.root.manager.loggerDict if name.startswith('streamlit')]:
+        logging.getLogger(logger_name).setLevel(logging.ERROR)
+    cwd = os.getcwd(); os.chdir(data_dir)
+    try:
+        app = AppTest.from_file(DASHBOARD_PATH, default_timeout=3600)
+        with recorder.measure('dashboard_tab', "첫 실행", 'run', rows) as entry:
+            app.run()
+            if app.exception: entry['error'] = "; ".join(str(e.value) for e in app.exception)
+        for tab in DASHBOARD_TABS:
+            with recorder.measure('dashboard_tab', tab, 'run', rows) as entry:
+                app.radio(key='main_tab_selector').set_value(tab).run()
+                if app.exception: entry['error'] = "; ".join(str(e.value) for e in app.exception)
+    finally:
+        os.chdir(cwd)
+
+def find_regressions(results, baseline_results, tolerance):
+    # 같은 (대상, 이름, 단계, 행 수) 항목이 기준 결과보다 tolerance 비율 이상 느려졌거나 메모리를 더 쓰면 회귀로 봄
+    baseline = {(r['target'], r['name'], r['phase'], r['rows']): r for r in baseline_results}
+    regressions = []
+    for result in results:
+        before = baseline.get((result['target'], result['name'], result['phase'], result['rows']))
+        if before is None: continue
+        if result['seconds'] > before['seconds'] * (1 + tolerance) and result['seconds'] - before['seconds'] > REGRESSION_MIN_SECONDS:
+            regressions.append((result, 'seconds', before['seconds'], result['seconds']))
+        if 'peak_mb' in result and 'peak_mb' in before and result['peak_mb'] > before['peak_mb'] * (1 + tolerance) and result['peak_mb'] - before['peak_mb'] > 1:
+            regressions.append((result, 'peak_mb', before['peak_mb'], result['peak_mb']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="분석기 모드/대시보드 탭 합성 데이터 벤치마크")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000], help="생산/불량 실적 행 수 목록 (예: 10000 100000 1000000 10000000)")
+    parser.add_argument('--output', default="benchmark_results.json", help="결과 JSON 파일 경로")
+    parser.add_argument('--work-dir', help="합성 입력/결과 파일을 둘 폴더 (기본: 임시 폴더, 실행 후 삭제)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="tracemalloc 없이 시간만 측정")
+    parser.add_argument('--skip-dashboard', action='store_true', help="대시보드 측정 생략")
+    parser.add_argument('--skip-tabs', action='store_true', help="Streamlit AppTest 탭 측정 생략")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON (회귀가 있으면 종료 코드 1)")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="회귀로 볼 증가 비율")
+    parser.add_argument('--skip-shard-check', action='store_true', help="샤딩/비샤딩 보고서 일치 검사 생략")
+    args = parser.parse_args(argv)
+
+    output_path = os.path.abspath(args.output)
+    work_dir = os.path.abspath(args.work_dir) if args.work_dir else tempfile.mkdtemp(prefix="analyzer_bench_")
+    recorder, analyzer = Recorder(trace_memory=not args.no_memory), load_analyzer()
+    dashboard = None if args.skip_dashboard else load_dashboard_helpers()
+    cwd, shard_mismatches = os.getcwd(), []
+    try:
+        for rows in args.rows:
+            data_dir = os.path.join(work_dir, f"rows_{rows}")
+            shutil.rmtree(data_dir, ignore_errors=True)
+            with recorder.measure('generator', "합성 입력 파일", 'generate', rows): generate_inputs(data_dir, rows, args.seed)
+            os.chdir(data_dir)
+            try:
+                bench_analyzer(analyzer, data_dir, rows, recorder)
+                if not args.skip_shard_check: shard_mismatches += check_shard_equivalence(analyzer, rows)
+            finally: os.chdir(cwd)
+            if dashboard is not None:
+                bench_dashboard_prep(dashboard, data_dir, rows, recorder)
+                if not args.skip_tabs: bench_dashboard_tabs(data_dir, rows, recorder)
+    finally:
+        os.chdir(cwd)
+        if not args.work_dir: shutil.rmtree(work_dir, ignore_errors=True)
+
+    meta = {'created_at': datetime.now().isoformat(timespec='seconds'), 'python': sys.version.split()[0], 'pandas': pd.__version__,
+            'platform': platform.platform(), 'rows': args.rows, 'seed': args.seed, 'trace_memory': not args.no_memory,
+            'shard_mismatches': len(shard_mismatches)}
+    try:
+        import resource
+        meta['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    with open(output_path, 'w', encoding='utf-8') as f: json.dump({'meta': meta, 'results': recorder.results}, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output_path}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f: baseline_results = json.load(f)['results']
+        regressions = find_regressions(recorder.results, baseline_results, args.tolerance)
+        for result, metric, before, after in regressions:
+            print(f"[회귀] {result['target']} {result['name']} [{result['phase']}] {result['rows']:,}행: {metric} {before} -> {after}")
+    return 1 if regressions or shard_mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
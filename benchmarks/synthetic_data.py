@@ -0,0 +1,111 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.targets import load_analyzer
+
+# 실제 내보내기 파일과 같은 이름/컬럼 구성의 합성 입력 파일 생성 (생산/불량 실적 1만 ~ 1,000만 행)
+FACTORIES = ["A관", "C관", "S관"]
+PROCESSES = ["[10] 사출조립", "[20] 분리", "[45] 하이드레이션/전면검사", "[55] 접착/멸균", "[80] 누수/규격검사"]
+CATEGORIES = ["원데이", "투위크", "먼슬리", "컬러"]
+MOISTURE_VALUES = np.array([38, 55, "58%", None], dtype=object)
+DEFECT_NAMES = ["이물", "찢어짐", "기포", "변형", "엣지불량", "파워불량"]
+MACHINES_PER_PROCESS = 8
+PRODUCT_COUNT = 200
+DATE_START, DATE_END = "2023-01-01", "2024-12-31"
+INPUT_FILE_NAMES = {'prod': "생산실적현황.xlsx", 'capa': "가동율참고.xlsx", 'target': "생산목표량.xlsx",
+                    'criteria': "설비리스트및저가동설비기준.xlsx", 'defect': "불량실적현황.xlsx"}
+
+def _machines():
+    return pd.DataFrame([(factory, process, f"{factory[0]}{process[1:3]}{i:02d}") for factory in FACTORIES for process in PROCESSES for i in range(MACHINES_PER_PROCESS)],
+                        columns=['공장', '공정코드', '기계코드'])
+
+def _with_commas(values, rng, ratio=0.02):
+    # 일부 수량은 '1,234' 같은 문자열로 저장된 셀을 흉내냄
+    out = values.astype(object)
+    selected = np.flatnonzero(rng.random(len(values)) < ratio)
+    out[selected] = [f"{v:,}" for v in values[selected]]
+    return out
+
+def production_frame(rows, rng, machines):
+    dates = pd.date_range(DATE_START, DATE_END, freq='D')
+    date_index = np.sort(rng.integers(0, len(dates), rows))
+    date_labels = np.asarray(dates.strftime('%Y.%m.%d'), dtype=object)[date_index]
+    date_labels[rng.random(rows) < 0.0001] = None
+    date_labels[rows // 2] = None
+    machine_index = rng.integers(0, len(machines), rows)
+    # 공장이 비어 있는 행도 몇 개 섞음 (샤딩 일치 검사가 빈 공장 행을 거치도록 최소 한 행은 보장)
+    factories = machines['공장'].to_numpy()[machine_index].astype(object)
+    factories[rng.random(rows) < 0.0001] = None
+    factories[rows // 3] = None
+    produced = rng.integers(100, 5000, rows)
+    defective = (produced * rng.random(rows) * 0.1).astype(np.int64)
+    sampled = rng.integers(0, 10, rows)
+    return pd.DataFrame({
+        '생산실적번호': np.char.add('R', np.char.zfill(np.arange(rows).astype(str), 9)).astype(object),
+        '생산일자': date_labels,
+        '공장': factories,
+        '공정코드': machines['공정코드'].to_numpy()[machine_index],
+        '기계코드': machines['기계코드'].to_numpy()[machine_index],
+        '품명': np.char.add('품목', rng.integers(0, PRODUCT_COUNT, rows).astype(str)).astype(object),
+        '신규분류요약': np.asarray(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)],
+        '함수율': MOISTURE_VALUES[rng.integers(0, len(MOISTURE_VALUES), rows)],
+        '작업자': np.asarray(["작업자A", "작업자B", "작업자C"], dtype=object)[rng.integers(0, 3, rows)],
+        '비고': None,
+        '양품수량': _with_commas(produced - defective - sampled, rng),
+        '불량수량': _with_commas(defective, rng),
+        '샘플수량': sampled,
+        '생산수량': _with_commas(produced, rng),
+    }), date_index < len(pd.date_range(DATE_START, "2023-12-31", freq='D'))
+
+def defect_frame(prod_df, rows, rng):
+    # 생산 실적 일부에 불량 유형을 1~3개씩 붙임. '불량수량'은 전체/유형별 두 컬럼이 같은 이름으로 반복됨
+    run_index = np.sort(rng.choice(len(prod_df), size=min(len(prod_df), max(1, rows // 2)), replace=False))
+    run_index = np.repeat(run_index, rng.integers(1, 4, len(run_index)))[:rows]
+    runs = prod_df.iloc[run_index]
+    df = pd.DataFrame({
+        '생산실적번호': runs['생산실적번호'].to_numpy(), '생산일자': runs['생산일자'].to_numpy(), '공장': runs['공장'].to_numpy(),
+        '공정코드': runs['공정코드'].to_numpy(), '신규분류요약': runs['신규분류요약'].to_numpy(), '함수율': runs['함수율'].to_numpy(),
+        '품명': runs['품명'].to_numpy(), '사출기계코드': np.char.add('I', runs['기계코드'].to_numpy().astype(str)).astype(object),
+        '공정기계코드': np.char.add('P', runs['기계코드'].to_numpy().astype(str)).astype(object),
+        '불량명': np.asarray(DEFECT_NAMES, dtype=object)[rng.integers(0, len(DEFECT_NAMES), len(runs))],
+        '양품수량': runs['양품수량'].to_numpy(), '불량수량': runs['불량수량'].to_numpy(), '불량수량_유형별': rng.integers(0, 50, len(runs)),
+    })
+    return df.rename(columns={'불량수량_유형별': '불량수량'})
+
+def target_frame(rng):
+    # 일부 달은 비워 두어 가장 가까운 달의 목표를 찾는 경로도 실행되게 함
+    months = [(ts.year, ts.month) for ts in pd.date_range(DATE_START, DATE_END, freq='MS') if ts.month not in (3, 9)]
+    return pd.DataFrame([{'년': year, '월': month, '공장': factory, '공정코드': process, '일일_생산목표량': int(rng.integers(50000, 200000))}
+                         for year, month in months for factory in FACTORIES for process in PROCESSES])
+
+def generate_inputs(out_dir, rows, seed=0):
+    # 분석기가 자동으로 찾는 다섯 입력 파일을 out_dir에 저장하고 {파일 종류: 경로}를 반환
+    analyzer, rng, machines = load_analyzer(), np.random.default_rng(seed), _machines()
+    os.makedirs(out_dir, exist_ok=True)
+    prod_df, is_first_year = production_frame(rows, rng, machines)
+    capacity_df = machines.assign(**{'이론상 최대 생산량': np.where(rng.random(len(machines)) < 0.05, 0, rng.integers(3000, 9000, len(machines)))})
+    criteria_df = machines.assign(저가동설비기준=rng.choice([0.3, 0.4, 0.5, 0.6], len(machines)))
+    target_df = target_frame(rng)
+    sheets = {
+        'prod': {"2023": prod_df[is_first_year], "2024": prod_df[~is_first_year]},
+        'capa': {"Sheet1": capacity_df},
+        'target': {str(year): group for year, group in target_df.groupby('년')},
+        'criteria': {"Sheet1": criteria_df},
+        'defect': {"Sheet1": defect_frame(prod_df, rows, rng)},
+    }
+    paths = {}
+    for file_type, sheets_data in sheets.items():
+        paths[file_type] = os.path.join(out_dir, INPUT_FILE_NAMES[file_type])
+        analyzer.save_sheets_excel_autofit(sheets_data, paths[file_type])
+    return paths
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 입력 파일 생성")
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows', type=int, default=10000, help="생산/불량 실적 행 수 (1만 ~ 1,000만)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    for file_type, path in generate_inputs(args.out_dir, args.rows, args.seed).items(): print(f"{file_type}: {path}")
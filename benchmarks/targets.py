@@ -0,0 +1,28 @@
+import importlib.util
+import os
+import sys
+import types
+
+# 벤치마크 대상 스크립트 (파일명에 '.'이 있거나 UI 코드가 모듈 최상단에 있어 일반 import로는 불러올 수 없음)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALYZER_PATH = os.path.join(REPO_ROOT, "analyzer_v4.0.py")
+DASHBOARD_PATH = os.path.join(REPO_ROOT, "DashBoard_V46_cursor_V022.py")
+DASHBOARD_UI_MARKER = "# --- 대시보드 UI 시작 ---"
+DASHBOARD_TABS = ["종합 분석", "목표 달성률", "수율 분석", "불량유형별 분석", "가동률 분석", "저가동 설비"]
+
+def load_analyzer():
+    # 프로세스 풀 작업 함수가 pickle될 수 있도록 sys.modules에 등록한 뒤 실행 (이미 불러왔으면 같은 모듈을 돌려줘야 pickle 대상 함수가 일치함)
+    if "analyzer_v4" in sys.modules: return sys.modules["analyzer_v4"]
+    spec = importlib.util.spec_from_file_location("analyzer_v4", ANALYZER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def load_dashboard_helpers():
+    # 대시보드는 UI 시작 표시 이전(데이터 로딩/가공 함수)까지만 실행해서 함수만 가져옴
+    with open(DASHBOARD_PATH, encoding="utf-8") as f: source = f.read()
+    module = types.ModuleType("dashboard_helpers")
+    module.__file__ = DASHBOARD_PATH
+    exec(compile(source[:source.index(DASHBOARD_UI_MARKER)], DASHBOARD_PATH, "exec"), module.__dict__)
+    return module